@@ -0,0 +1,139 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from tts_scheduler import PrioritySemaphore, PRIORITY_STREAM_CHUNK
+from voice_logging import log
+
+
+def retry_after_seconds(headers, default=1.0):
+    """Seconds to back off after a 429, from Retry-After when the server sent one"""
+    try:
+        return max(0.0, float(headers.get("retry-after", default)))
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenBucket:
+    """Requests-per-second limiter; tokens may go negative to queue callers in order"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def reserve(self):
+        """Take a token; returns how long the caller has to wait before using it"""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class UpstreamLimiter:
+    """Admission control for one upstream resource (STT, TTS or chat).
+
+    Callers enter through slot(priority): at most `max_concurrency` calls run
+    at once, waiters are admitted lowest priority number first, and with a
+    `rate_per_minute` a token bucket paces admissions to the provider quota.
+    Tokens are handed out one at a time through a priority-ordered gate, so
+    first-audio callers get the next token ahead of queued background work,
+    and the wait for a token happens before a concurrency slot is taken.
+    throttle() pauses new admissions after the provider answers 429, so a
+    burst queues up here instead of failing everyone upstream.
+    """
+
+    def __init__(self, name, max_concurrency, rate_per_minute=0, burst=None):
+        self.name = name
+        self.slots = PrioritySemaphore(max_concurrency)
+        self.rate_per_minute = rate_per_minute
+        self.bucket = (
+            TokenBucket(rate_per_minute / 60.0, burst or max_concurrency)
+            if rate_per_minute else None
+        )
+        self.pacer = PrioritySemaphore(1) if self.bucket else None
+        self._paused_until = 0.0
+        self.admitted = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.max_queue_depth = 0
+
+    @asynccontextmanager
+    async def slot(self, priority=PRIORITY_STREAM_CHUNK):
+        start = time.monotonic()
+        if self.slots.waiting or self.slots.in_use >= self.slots.limit:
+            self.max_queue_depth = max(self.max_queue_depth, self.slots.waiting + 1)
+        if self.pacer:
+            async with self.pacer.slot(priority):
+                await self._wait_for_token()
+        else:
+            await self._wait_for_token()
+        async with self.slots.slot(priority):
+            # A 429 while we queued for the slot: nobody should go upstream yet
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            waited = time.monotonic() - start
+            self.admitted += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            yield
+
+    async def _wait_for_token(self):
+        delay = self._paused_until - time.monotonic()
+        if self.bucket:
+            delay = max(delay, self.bucket.reserve())
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def throttle(self, seconds):
+        self.throttled += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        log.warning("upstream_throttled", limiter=self.name, pause_seconds=round(seconds, 1))
+
+    def stats(self):
+        return {
+            **self.slots.stats(),
+            "rate_per_minute": self.rate_per_minute or "unlimited",
+            "pacing": self.pacer.waiting if self.pacer else 0,
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "avg_wait_ms": round(1000 * self.total_wait / self.admitted, 1) if self.admitted else 0,
+            "max_wait_ms": round(1000 * self.max_wait, 1),
+            "max_queue_depth": self.max_queue_depth
+        }
+
+
+async def read_ahead(source):
+    """Yield from an async iterator that a background task drains eagerly.
+
+    Whatever the source holds while it runs (a limiter slot, a pooled
+    connection) is released as soon as the upstream is done, not when a slow
+    consumer gets round to the last item. Errors are re-raised to the
+    consumer; closing the consumer cancels the task.
+    """
+    queue = asyncio.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for item in source:
+                queue.put_nowait((item, None))
+            queue.put_nowait((done, None))
+        except Exception as e:
+            queue.put_nowait((done, e))
+
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            item, error = await queue.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        task.cancel()
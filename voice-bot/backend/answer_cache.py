@@ -0,0 +1,28 @@
+import re
+import unicodedata
+
+# Filler words that don't change what is being asked. Negations and most
+# question words are deliberately absent: "when is it open" and "where is
+# it open" must stay different questions.
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "am", "was", "were", "be", "do", "does",
+    "did", "what", "what's", "whats", "your", "you", "me", "my", "i", "we",
+    "our", "us", "please", "tell", "can", "could", "would", "will", "to",
+    "of", "for", "about", "there", "any", "some", "hi", "hello", "hey", "so",
+    "um", "uh", "like", "just", "know", "want", "need", "let",
+}
+
+
+def normalize_question(text, strip_stopwords=False):
+    """Canonical form of a question for answer caching.
+
+    Case, punctuation and Unicode forms are folded away. With strip_stopwords
+    (CHAT_CACHE_STRIP_STOPWORDS), "What are your office hours?" and "office
+    hours" both become "office hours". Returns "" when nothing meaningful is left.
+    """
+    text = unicodedata.normalize("NFKC", text).lower()
+    words = re.sub(r"[^\w\s']", " ", text).split()
+    words = [word.strip("'") for word in words]
+    if strip_stopwords:
+        words = [word for word in words if word not in STOPWORDS]
+    return " ".join(word for word in words if word)
@@ -0,0 +1,112 @@
+import io
+
+
+class AudioBuffer:
+    """Growable per-connection buffer for incoming microphone frames.
+
+    Appends go into a bytearray, so accumulating an utterance is linear in its
+    length instead of copying everything received so far on every frame.
+    take() hands the filled buffer off as a memoryview and starts a fresh one,
+    so the recording reaches the STT uploader without another copy.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._data = bytearray()
+        self.truncated = False
+
+    def __len__(self):
+        return len(self._data)
+
+    def append(self, chunk):
+        """Add a frame; returns False (and drops it) once the cap is reached"""
+        if len(self._data) + len(chunk) > self.max_bytes:
+            self.truncated = True
+            return False
+        self._data += chunk
+        return True
+
+    def view(self):
+        return memoryview(self._data)
+
+    def take(self):
+        data = self._data
+        self._data = bytearray()
+        self.truncated = False
+        return memoryview(data)
+
+    def clear(self):
+        self._data = bytearray()
+        self.truncated = False
+
+
+class BufferReader(io.RawIOBase):
+    """Read-only file object over a bytes-like buffer, without copying it.
+
+    Lets the OpenAI client stream a memoryview (or bytes) as a multipart
+    upload where io.BytesIO would first make a private copy.
+    """
+
+    def __init__(self, data, name):
+        super().__init__()
+        self._view = memoryview(data).cast("B")
+        self._pos = 0
+        self.name = name
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        chunk = self._view[self._pos:self._pos + len(b)]
+        n = len(chunk)
+        b[:n] = chunk
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = len(self._view) + offset
+        self._pos = max(0, min(self._pos, len(self._view)))
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+
+class FileReader(io.RawIOBase):
+    """Named, read-only wrapper around an open file such as a spooled upload.
+
+    The STT uploader reads it in chunks straight from the spool. fileno() is
+    deliberately not exposed: httpx would call it to size the body, and that
+    forces a SpooledTemporaryFile still held in memory out to disk.
+    """
+
+    def __init__(self, fileobj, name):
+        super().__init__()
+        self._file = fileobj
+        self.name = name
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, b):
+        data = self._file.read(len(b))
+        n = len(data)
+        b[:n] = data
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
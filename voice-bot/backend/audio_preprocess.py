@@ -0,0 +1,92 @@
+import io
+import struct
+import wave
+
+from vad import frame_features, np, parse_wav_header, pcm16_to_mono
+
+STT_SAMPLE_RATE = 16000
+
+
+def resample(samples, source_rate, target_rate=STT_SAMPLE_RATE):
+    """Resample a mono float array; box-filters first when downsampling"""
+    if source_rate == target_rate or len(samples) == 0:
+        return samples
+    ratio = source_rate / target_rate
+    if ratio > 1:
+        width = int(np.ceil(ratio))
+        kernel = np.ones(width, dtype=np.float32) / width
+        samples = np.convolve(samples, kernel, mode="same")
+    target_len = int(len(samples) / ratio)
+    positions = np.arange(target_len, dtype=np.float64) * ratio
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def trim_silence(samples, sample_rate, threshold_db=-45.0, frame_ms=30, pad_ms=200):
+    """Cut leading/trailing silence; returns None if there is no speech at all.
+
+    Whether there is speech is decided against the absolute `threshold_db`.
+    The recording's own noise floor only moves the trim points, so a clip
+    that is loud from start to finish is kept whole rather than dropped.
+    """
+    frame_len = int(sample_rate * frame_ms / 1000)
+    if len(samples) < frame_len:
+        return None
+    energy_db, zcr = frame_features(samples, frame_len)
+    voiced = (energy_db > threshold_db) & (zcr < 0.45)
+    if not voiced.any():
+        return None
+    noise_floor = float(np.percentile(energy_db, 10))
+    speech = np.flatnonzero(voiced & (energy_db > noise_floor + 12.0))
+    if speech.size == 0:
+        speech = np.flatnonzero(voiced)
+    pad = int(sample_rate * pad_ms / 1000)
+    start = max(0, int(speech[0]) * frame_len - pad)
+    end = min(len(samples), (int(speech[-1]) + 1) * frame_len + pad)
+    return samples[start:end]
+
+
+def pcm16_to_wav(pcm, sample_rate, channels=1):
+    """Put a WAV header in front of raw little-endian 16-bit PCM"""
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + len(pcm), b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, sample_rate * channels * 2, channels * 2, 16,
+        b"data", len(pcm)
+    )
+    return header + bytes(pcm)
+
+
+def encode_wav(samples, sample_rate=STT_SAMPLE_RATE):
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    out = io.BytesIO()
+    with wave.open(out, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return out.getvalue()
+
+
+def prepare_for_stt(audio_data, threshold_db=-45.0):
+    """Shrink a WAV recording before it is uploaded to Whisper.
+
+    PCM WAV input is downmixed to mono, resampled to 16 kHz and trimmed of
+    leading and trailing silence. Returns (audio, has_speech): has_speech is
+    False when the recording is silent and the STT call can be skipped.
+    Anything that isn't 16-bit PCM WAV (WebM, Ogg, MP3) passes through as-is.
+    """
+    if np is None:
+        return audio_data, True
+    header = parse_wav_header(audio_data)
+    if header is None:
+        return audio_data, True
+
+    sample_rate, channels, _, data_offset = header
+    pcm = memoryview(audio_data)[data_offset:]
+    pcm = pcm[:len(pcm) - len(pcm) % (2 * channels)]
+    samples = pcm16_to_mono(pcm, channels)
+    samples = resample(samples, sample_rate)
+    trimmed = trim_silence(samples, STT_SAMPLE_RATE, threshold_db)
+    if trimmed is None:
+        return b"", False
+    return encode_wav(trimmed), True
@@ -0,0 +1,210 @@
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows): the store is then single-process only
+    fcntl = None
+
+
+class DiskAudioStore:
+    """Content-addressed on-disk store for synthesized audio, shared by workers.
+
+    Each clip lives in its own file named after its cache key, written to a
+    temp name and renamed into place. get() returns a read-only mmap, so a
+    hit is served from the page cache without being copied onto the heap.
+
+    The index file is an append-only log of writes and deletions that every
+    uvicorn worker follows: each change takes an exclusive flock on the
+    store, first replays the lines other workers appended since it last
+    looked, then appends its own. So the TTL and the byte budget are applied
+    to the whole directory, not per process. The log is compacted on startup
+    under the same lock. put() writes files and unlinks evicted ones, so
+    callers on the event loop run it (and get()) in an executor.
+    """
+
+    INDEX_NAME = "index.jsonl"
+    LOCK_NAME = ".lock"
+
+    def __init__(self, root, ttl, max_bytes):
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._index = OrderedDict()  # key -> (size, created_at)
+        self._index_inode = None
+        self._index_offset = 0
+        self.bytes_on_disk = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._index_path = os.path.join(root, self.INDEX_NAME)
+        self._lock_file = open(os.path.join(root, self.LOCK_NAME), "a")
+        with self._locked():
+            self._sync_index()
+            now = time.time()
+            for key, (size, created_at) in list(self._index.items()):
+                if now - created_at >= self.ttl or not os.path.exists(self._path(key)):
+                    self._forget(key)
+            self._rewrite_index()
+            self._enforce_budget()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + ".bin")
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive across this process's threads and, with flock, other workers"""
+        with self._lock:
+            if fcntl:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _sync_index(self):
+        """Replay index lines appended by other workers; reload if it was compacted"""
+        try:
+            st = os.stat(self._index_path)
+        except FileNotFoundError:
+            return
+        if st.st_ino != self._index_inode or st.st_size < self._index_offset:
+            self._index.clear()
+            self.bytes_on_disk = 0
+            self._index_inode = st.st_ino
+            self._index_offset = 0
+        if st.st_size == self._index_offset:
+            return
+
+        with open(self._index_path, "rb") as f:
+            f.seek(self._index_offset)
+            data = f.read()
+        self._index_offset += len(data)
+        for line in data.splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn write from a crashed worker
+            key = record.get("k")
+            if not key:
+                continue
+            self._forget(key)
+            if not record.get("d"):
+                self._index[key] = (record["s"], record["t"])
+                self.bytes_on_disk += record["s"]
+
+    def _forget(self, key):
+        entry = self._index.pop(key, None)
+        if entry:
+            self.bytes_on_disk -= entry[0]
+
+    def _rewrite_index(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".index-")
+        with os.fdopen(fd, "w") as f:
+            for key, (size, created_at) in self._index.items():
+                f.write(json.dumps({"k": key, "s": size, "t": created_at}) + "\n")
+            size = f.tell()
+        os.replace(tmp_path, self._index_path)
+        self._index_inode = os.stat(self._index_path).st_ino
+        self._index_offset = size
+
+    def _append_index(self, record):
+        # Called under the store lock right after _sync_index, so we are at the end
+        line = (json.dumps(record) + "\n").encode()
+        fd = os.open(self._index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            self._index_inode = os.fstat(fd).st_ino
+        finally:
+            os.close(fd)
+        self._index_offset += len(line)
+
+    def get(self, key):
+        """Return a read-only mmap of the clip, or None on a miss.
+
+        The mapping holds its own descriptor until it is closed or garbage
+        collected, so use it for one response and drop it; don't cache it.
+        Expired files are left for put() to remove, so a lookup never writes.
+        """
+        view = None
+        try:
+            with open(self._path(key), "rb") as f:
+                st = os.fstat(f.fileno())
+                if st.st_size and time.time() - st.st_mtime < self.ttl:
+                    view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            if view is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return view
+
+    def put(self, key, audio_content):
+        size = len(audio_content)
+        if size == 0 or size > self.max_bytes:
+            return False
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio_content)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        created_at = time.time()
+        with self._locked():
+            self._sync_index()
+            self._forget(key)
+            self._index[key] = (size, created_at)
+            self.bytes_on_disk += size
+            self.writes += 1
+            self._append_index({"k": key, "s": size, "t": created_at})
+            self._enforce_budget()
+        return True
+
+    def _discard(self, key):
+        self._forget(key)
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+        self._append_index({"k": key, "d": 1})
+
+    def _enforce_budget(self):
+        """Drop expired clips from the old end, then the oldest until under budget"""
+        now = time.time()
+        while self._index:
+            oldest_key, (_, created_at) = next(iter(self._index.items()))
+            if now - created_at < self.ttl and self.bytes_on_disk <= self.max_bytes:
+                break
+            self._discard(oldest_key)
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            "items": len(self._index),
+            "bytes_on_disk": self.bytes_on_disk,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,128 @@
+import time
+from collections import deque
+
+from voice_logging import log
+
+
+class BackendUnavailable(Exception):
+    """Raised instead of calling a backend whose circuit is open"""
+
+
+class BackendHealth:
+    """Circuit breaker and latency tracking for one HTTP backend.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    callers fail fast for `reset_timeout` seconds; then a single probe request
+    is let through (half-open) and its outcome closes or reopens the circuit.
+    Recent latencies give an adaptive request timeout (p99 * multiplier,
+    clamped to [min_timeout, max_timeout]) and the p95 delay used for hedging.
+    """
+
+    def __init__(self, url, failure_threshold=5, reset_timeout=30.0, min_timeout=2.0,
+                 max_timeout=30.0, timeout_multiplier=3.0, hedge_delay=2.0,
+                 window=200, min_samples=20):
+        self.url = url
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.timeout_multiplier = timeout_multiplier
+        self.default_hedge_delay = hedge_delay
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.successes = 0
+        self.failures = 0
+        self.short_circuited = 0
+
+    def allow_request(self):
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.short_circuited += 1
+                return False
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                self.short_circuited += 1
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def record_success(self, latency=None):
+        self.successes += 1
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+        if self.state != "closed":
+            log.info("circuit_closed", backend=self.url)
+            self.state = "closed"
+        if latency is not None:
+            self._latencies.append(latency)
+
+    def record_failure(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                log.warning("circuit_opened", backend=self.url, reset_seconds=self.reset_timeout)
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def release(self):
+        """The request was abandoned before it had an outcome (e.g. lost a hedge race)"""
+        self._probe_in_flight = False
+
+    def percentile(self, q):
+        if len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+    def timeout(self):
+        p99 = self.percentile(99)
+        if p99 is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, p99 * self.timeout_multiplier))
+
+    def hedge_delay(self):
+        p95 = self.percentile(95)
+        return self.default_hedge_delay if p95 is None else p95
+
+    def stats(self):
+        p50, p95, p99 = (self.percentile(q) for q in (50, 95, 99))
+        return {
+            "state": self.state,
+            "successes": self.successes,
+            "failures": self.failures,
+            "short_circuited": self.short_circuited,
+            "p50_ms": round(p50 * 1000) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000) if p95 is not None else None,
+            "p99_ms": round(p99 * 1000) if p99 is not None else None,
+            "timeout_s": round(self.timeout(), 2)
+        }
+
+
+class BackendRegistry:
+    """One BackendHealth per backend URL, created on first use"""
+
+    def __init__(self, **settings):
+        self.settings = settings
+        self._backends = {}
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def get(self, url):
+        health = self._backends.get(url)
+        if health is None:
+            health = self._backends[url] = BackendHealth(url, **self.settings)
+        return health
+
+    def stats(self):
+        return {
+            "hedged_requests": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "backends": {url: health.stats() for url, health in self._backends.items()}
+        }
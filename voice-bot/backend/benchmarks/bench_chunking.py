@@ -0,0 +1,117 @@
+"""Compare time-to-first-audio of the adaptive segmenter and the old splitter.
+
+Models each TTS request as `overhead + chars * per_char` seconds, runs the
+chunks through the same bounded, in-order schedule the streaming endpoint
+uses, and reports time to first audio, total synthesis time, playback stalls
+and request count for a set of typical clinic answers.
+
+    python benchmarks/bench_chunking.py
+    python benchmarks/bench_chunking.py --overhead 0.6 --per-char 0.006 --concurrency 2
+"""
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streaming_text import segment_text  # noqa: E402
+
+SAMPLE_REPLIES = [
+    "Our office hours are Monday to Friday 9 AM to 6 PM, and Saturday 9 AM to 2 PM. How can I help you?",
+    "I'd be happy to help you schedule an appointment. Please call us at 425-775-5162 or let me know your preferred date.",
+    "Dr. Tomar offers comprehensive dental care including cleanings, fillings, crowns, root canals and "
+    "cosmetic treatments such as whitening and veneers, and new patients are always welcome so if you "
+    "would like to come in for a first visit we can usually find a time within the same week",
+    "For a routine cleaning, plan on about an hour. We'll take X-rays if you haven't had them in the last "
+    "year, the hygienist will clean and polish your teeth, and Dr. Tomar will do a quick exam! If we find "
+    "anything that needs treatment, we'll walk you through the options and costs before doing any work. "
+    "Most insurance plans cover two cleanings a year at 100%.",
+    "We accept most PPO plans, including Premera, Regence, Delta Dental, Aetna, Cigna and MetLife. "
+    "If you're not sure whether your plan is in network, call us at 425-775-5162 and we'll check for you.\n"
+    "- Bring your insurance card\n- Bring a photo ID\n- Arrive 10 minutes early to fill out forms",
+    "Yes, we see children! Kids usually start at age 3, and the first visit is short and fun.",
+]
+
+
+def legacy_split(text, chunk_size=150):
+    """The splitter used before adaptive segmentation"""
+    sentences = text.split('. ')
+    chunks = []
+    current_chunk = ""
+    for sentence in sentences:
+        if len(current_chunk + sentence + '. ') <= chunk_size:
+            current_chunk += sentence + '. '
+        else:
+            if current_chunk:
+                chunks.append(current_chunk.strip())
+            current_chunk = sentence + '. '
+    if current_chunk:
+        chunks.append(current_chunk.strip())
+    return chunks
+
+
+def simulate(chunks, overhead, per_char, concurrency, speech_rate):
+    """Return (ttfa, synth_done, stall) for an in-order bounded schedule"""
+    slots = [0.0] * concurrency
+    ready = []
+    for chunk in chunks:
+        slot = min(range(concurrency), key=lambda i: slots[i])
+        start = slots[slot]
+        finish = start + overhead + len(chunk) * per_char
+        slots[slot] = finish
+        ready.append(finish)
+
+    # Chunk i can only be sent once 0..i are ready (reorder buffer)
+    for i in range(1, len(ready)):
+        ready[i] = max(ready[i], ready[i - 1])
+
+    ttfa = ready[0]
+    clock = ttfa
+    stall = 0.0
+    for i, chunk in enumerate(chunks):
+        if ready[i] > clock:
+            stall += ready[i] - clock
+            clock = ready[i]
+        clock += len(chunk) / speech_rate
+    return ttfa, ready[-1], stall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--overhead", type=float, default=0.45, help="fixed seconds per TTS request")
+    parser.add_argument("--per-char", type=float, default=0.004, help="seconds of synthesis per character")
+    parser.add_argument("--concurrency", type=int, default=3, help="in-flight TTS calls per reply")
+    parser.add_argument("--speech-rate", type=float, default=15.0, help="characters of audio per second")
+    parser.add_argument("--first-chunk-size", type=int, default=60)
+    parser.add_argument("--chunk-size", type=int, default=150)
+    args = parser.parse_args()
+
+    splitters = {
+        "legacy": lambda text: legacy_split(text, args.chunk_size),
+        "adaptive": lambda text: segment_text(
+            text, first_chunk_size=args.first_chunk_size, chunk_size=args.chunk_size
+        ),
+    }
+
+    print(f"{'splitter':<10} {'ttfa p50':>9} {'ttfa max':>9} {'synth p50':>10} "
+          f"{'stall sum':>10} {'requests':>9} {'first chunk':>12}")
+    for name, split in splitters.items():
+        ttfas, synths, stalls, requests, first_lengths = [], [], [], 0, []
+        for reply in SAMPLE_REPLIES:
+            chunks = split(reply)
+            ttfa, synth, stall = simulate(
+                chunks, args.overhead, args.per_char, args.concurrency, args.speech_rate
+            )
+            ttfas.append(ttfa)
+            synths.append(synth)
+            stalls.append(stall)
+            requests += len(chunks)
+            first_lengths.append(len(chunks[0]))
+        print(f"{name:<10} {statistics.median(ttfas):>8.2f}s {max(ttfas):>8.2f}s "
+              f"{statistics.median(synths):>9.2f}s {sum(stalls):>9.2f}s {requests:>9} "
+              f"{statistics.median(first_lengths):>10.0f}ch")
+
+
+if __name__ == "__main__":
+    main()
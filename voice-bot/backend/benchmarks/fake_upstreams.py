@@ -0,0 +1,206 @@
+"""Local stand-ins for the OpenAI audio/realtime API and the chatbot backends.
+
+One FastAPI app serves both, so the voice backend can be pointed at it with
+OPENAI_BASE_URL=http://127.0.0.1:PORT/v1 and
+CHATBOT_URLS='{"default": "http://127.0.0.1:PORT/api/chat"}'.
+
+Every upstream gets a latency profile `base,jitter,error_rate`: each call
+waits base + an exponential tail with mean `jitter` seconds, and fails with
+`--error-status` at the given rate. Transcripts depend only on the uploaded
+audio, so repeated utterances exercise the caches the way real traffic does.
+
+    python benchmarks/fake_upstreams.py --port 9100 --profile typical
+    python benchmarks/fake_upstreams.py --port 9100 --chat 2.0,1.0,0.1 --error-status 429
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_chunking import SAMPLE_REPLIES  # noqa: E402
+
+# Questions that miss COMMON_RESPONSES, so every one reaches the chatbot
+QUESTIONS = [
+    "What are your office hours on Saturday",
+    "Can I book a cleaning for next week",
+    "Do you take Delta Dental insurance",
+    "How much does a crown cost",
+    "Do you see kids",
+    "How long does a root canal take",
+    "Are new patients welcome",
+    "What should I bring to my first visit",
+]
+
+# (base seconds, mean extra seconds, error rate) per upstream
+PROFILES = {
+    "fast": {"stt": (0.05, 0.02, 0.0), "tts": (0.05, 0.02, 0.0), "chat": (0.05, 0.02, 0.0),
+             "token_delay": 0.002, "tts_chunk_delay": 0.0},
+    "typical": {"stt": (0.35, 0.15, 0.0), "tts": (0.3, 0.15, 0.0), "chat": (0.6, 0.4, 0.0),
+                "token_delay": 0.02, "tts_chunk_delay": 0.02},
+    "degraded": {"stt": (0.8, 0.6, 0.02), "tts": (0.7, 0.5, 0.02), "chat": (1.5, 2.0, 0.05),
+                 "token_delay": 0.05, "tts_chunk_delay": 0.05},
+}
+
+# Roughly what tts-1 mp3 output weighs per input character
+TTS_BYTES_PER_CHAR = 300
+TTS_CHUNK_BYTES = 4096
+_AUDIO = os.urandom(1024 * 1024)  # incompressible, like real mp3
+
+
+def parse_profile(value):
+    parts = [float(part) for part in value.split(",")]
+    if not 1 <= len(parts) <= 3:
+        raise argparse.ArgumentTypeError("expected base[,jitter[,error_rate]]")
+    return tuple(parts + [0.0] * (3 - len(parts)))
+
+
+class Upstream:
+    """Latency and failure model for one fake upstream, plus call counters"""
+
+    def __init__(self, name, base, jitter=0.0, error_rate=0.0):
+        self.name = name
+        self.base = base
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.calls = 0
+        self.errors = 0
+
+    async def delay(self, scale=1.0):
+        extra = random.expovariate(1 / self.jitter) if self.jitter > 0 else 0.0
+        await asyncio.sleep((self.base + extra) * scale)
+
+    def should_fail(self):
+        self.calls += 1
+        if self.error_rate and random.random() < self.error_rate:
+            self.errors += 1
+            return True
+        return False
+
+    def stats(self):
+        return {"calls": self.calls, "errors": self.errors}
+
+
+def error_response(status):
+    headers = {"retry-after": "1"} if status == 429 else {}
+    body = {"error": {"message": "injected failure", "type": "fake_upstream", "code": status}}
+    return JSONResponse(body, status_code=status, headers=headers)
+
+
+def create_app(profile="typical", overrides=None, token_delay=None, error_status=500,
+               tts_chunk_delay=None):
+    settings = {**PROFILES[profile], **(overrides or {})}
+    upstreams = {name: Upstream(name, *settings[name]) for name in ("stt", "tts", "chat")}
+    token_delay = settings["token_delay"] if token_delay is None else token_delay
+    tts_chunk_delay = settings["tts_chunk_delay"] if tts_chunk_delay is None else tts_chunk_delay
+    app = FastAPI()
+
+    @app.post("/v1/audio/transcriptions")
+    async def transcriptions(request: Request):
+        form = await request.form()
+        audio = await form["file"].read()
+        stt = upstreams["stt"]
+        await stt.delay()
+        if stt.should_fail():
+            return error_response(error_status)
+        digest = hashlib.sha256(audio).digest()
+        text = QUESTIONS[digest[0] % len(QUESTIONS)]
+        if form.get("response_format") == "text":
+            return PlainTextResponse(text + "\n")
+        return {"text": text}
+
+    @app.post("/v1/audio/speech")
+    async def speech(request: Request):
+        body = await request.json()
+        tts = upstreams["tts"]
+        await tts.delay()
+        if tts.should_fail():
+            return error_response(error_status)
+        size = min(len(_AUDIO), max(TTS_CHUNK_BYTES, len(body.get("input", "")) * TTS_BYTES_PER_CHAR))
+
+        async def audio():
+            for offset in range(0, size, TTS_CHUNK_BYTES):
+                yield _AUDIO[offset:offset + TTS_CHUNK_BYTES]
+                await asyncio.sleep(tts_chunk_delay)
+
+        return StreamingResponse(audio(), media_type="audio/mpeg")
+
+    @app.post("/v1/realtime/sessions")
+    async def realtime_session(request: Request):
+        body = await request.json()
+        await upstreams["stt"].delay(scale=0.5)
+        return {
+            "id": "sess_fake",
+            "object": "realtime.session",
+            "model": body.get("model"),
+            "modalities": ["audio", "text"],
+            "voice": body.get("voice", "alloy"),
+            "client_secret": {"value": "ek_fake", "expires_at": 0}
+        }
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        message = body.get("message", "")
+        chat = upstreams["chat"]
+        if not body.get("stream"):
+            await chat.delay()
+            if chat.should_fail():
+                return error_response(error_status)
+            return {"response": SAMPLE_REPLIES[len(message) % len(SAMPLE_REPLIES)]}
+
+        # Streaming: the base latency is time to first token
+        await chat.delay()
+        if chat.should_fail():
+            return error_response(error_status)
+        words = SAMPLE_REPLIES[len(message) % len(SAMPLE_REPLIES)].split(" ")
+
+        async def events():
+            for word in words:
+                yield f"data: {json.dumps({'token': word + ' '})}\n\n"
+                await asyncio.sleep(token_delay)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.head("/")
+    async def head():
+        return Response()
+
+    @app.get("/stats")
+    async def stats():
+        return {name: upstream.stats() for name, upstream in upstreams.items()}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="typical")
+    parser.add_argument("--stt", type=parse_profile, help="base,jitter,error_rate for transcription")
+    parser.add_argument("--tts", type=parse_profile, help="base,jitter,error_rate for speech")
+    parser.add_argument("--chat", type=parse_profile, help="base,jitter,error_rate for the chatbot")
+    parser.add_argument("--token-delay", type=float, help="seconds between streamed chatbot tokens")
+    parser.add_argument("--tts-chunk-delay", type=float,
+                        help=f"seconds between streamed {TTS_CHUNK_BYTES}-byte speech chunks")
+    parser.add_argument("--error-status", type=int, default=500, help="status of injected failures")
+    args = parser.parse_args()
+
+    overrides = {name: getattr(args, name) for name in ("stt", "tts", "chat") if getattr(args, name)}
+    app = create_app(args.profile, overrides, args.token_delay, args.error_status, args.tts_chunk_delay)
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+"""Drive concurrent simulated callers through the voice backend, fully offline.
+
+For each scenario a fresh backend (uvicorn main:app) is started against
+fake_upstreams.py, so nothing talks to OpenAI or a real chatbot. N clients
+each run a number of turns, and the report gives throughput, turn latency
+percentiles, time to first audio and the backend's peak RSS.
+
+  voice-chat      POST /voice-chat with a WAV upload; TTFA = first response byte
+  tts             POST /tts; TTFA = first response byte
+  voice-realtime  PCM frames over /ws/voice-realtime until the VAD closes the
+                  utterance; latency runs from the last frame sent
+  voice-stream    one WAV message per turn over /ws/voice-stream
+
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --clients 50 --turns 10 --profile degraded
+    python benchmarks/load_test.py --scenario voice-stream --stream-reply --env TTS_STREAM_CONCURRENCY=4
+    python benchmarks/load_test.py --chat 2.0,1.0,0.1 --json results.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from array import array
+
+import httpx
+import websockets
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_chunking import SAMPLE_REPLIES  # noqa: E402
+from fake_upstreams import PROFILES, parse_profile  # noqa: E402
+
+SCENARIOS = ("voice-chat", "tts", "voice-realtime", "voice-stream")
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30  # the backend VAD's frame size
+FRAMES_PER_MESSAGE = 3
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def pcm_utterance(index, lead_frames=9, speech_frames=39, trailing_frames=0):
+    """Silence, a tone whose pitch identifies the utterance, then trailing silence"""
+    frame = SAMPLE_RATE * FRAME_MS // 1000
+    frequency = 180 + 15 * index
+    samples = array("h", bytes(2 * frame * lead_frames))
+    samples.extend(
+        int(9000 * math.sin(2 * math.pi * frequency * n / SAMPLE_RATE))
+        for n in range(frame * speech_frames)
+    )
+    samples.extend(array("h", bytes(2 * frame * trailing_frames)))
+    return samples.tobytes()
+
+
+def wav_utterance(index):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(pcm_utterance(index, trailing_frames=9))
+    return buffer.getvalue()
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def read_memory(pid):
+    """(current RSS, peak RSS) in MiB from /proc; None where unavailable"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            fields = dict(line.split(":", 1) for line in status if ":" in line)
+    except OSError:
+        return None, None
+    return tuple(
+        int(fields[key].split()[0]) / 1024 if key in fields else None
+        for key in ("VmRSS", "VmHWM")
+    )
+
+
+class Results:
+    def __init__(self):
+        self.latencies = []
+        self.ttfa = []
+        self.errors = 0
+        self.error_kinds = {}
+
+    def ok(self, latency, ttfa):
+        self.latencies.append(latency)
+        if ttfa is not None:
+            self.ttfa.append(ttfa)
+
+    def fail(self, kind):
+        self.errors += 1
+        self.error_kinds[kind] = self.error_kinds.get(kind, 0) + 1
+
+
+class Process:
+    """A child process started with its output captured to a file"""
+
+    def __init__(self, args, env, log_path, cwd):
+        self.log_path = log_path
+        self.log = open(log_path, "wb")
+        self.proc = subprocess.Popen(args, cwd=cwd, env=env, stdout=self.log, stderr=subprocess.STDOUT)
+
+    @property
+    def pid(self):
+        return self.proc.pid
+
+    def stop(self):
+        if self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        self.log.close()
+
+
+async def wait_until_up(url, proc, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as http:
+        while time.monotonic() < deadline and proc.proc.poll() is None:
+            try:
+                await http.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.1)
+    proc.log.flush()
+    with open(proc.log_path, errors="replace") as log:
+        output = log.read()[-2000:]
+    raise RuntimeError(f"{url} did not come up:\n{output}")
+
+
+# --- one turn per scenario -------------------------------------------------
+
+async def turn_voice_chat(http, base_url, index, args):
+    started = time.monotonic()
+    ttfa = None
+    files = {"file": ("utterance.wav", wav_utterance(index), "audio/wav")}
+    async with http.stream("POST", f"{base_url}/voice-chat", files=files) as response:
+        async for chunk in response.aiter_bytes():
+            if ttfa is None and chunk:
+                ttfa = time.monotonic() - started
+    if response.status_code != 200:
+        raise TurnFailed(f"http_{response.status_code}")
+    if not response.headers.get("content-type", "").startswith("audio/"):
+        raise TurnFailed("no_audio")
+    return time.monotonic() - started, ttfa
+
+
+async def turn_tts(http, base_url, index, args):
+    started = time.monotonic()
+    ttfa = None
+    text = SAMPLE_REPLIES[index % len(SAMPLE_REPLIES)]
+    if index >= len(SAMPLE_REPLIES):
+        text = f"{text} Reference {index}."
+    async with http.stream("POST", f"{base_url}/tts", json={"text": text}) as response:
+        async for chunk in response.aiter_bytes():
+            if ttfa is None and chunk:
+                ttfa = time.monotonic() - started
+    if response.status_code != 200:
+        raise TurnFailed(f"http_{response.status_code}")
+    return time.monotonic() - started, ttfa
+
+
+async def wait_for_turn(ws, started, done_types):
+    """Read messages until the turn ends; returns (latency, ttfa)"""
+    ttfa = None
+    while True:
+        message = await ws.recv()
+        now = time.monotonic() - started
+        if isinstance(message, bytes):
+            ttfa = now if ttfa is None else ttfa
+            continue
+        data = json.loads(message)
+        kind = data.get("type")
+        if kind in ("audio_chunk", "audio_response", "chunk_audio", "audio") and ttfa is None:
+            ttfa = now
+        elif kind == "processing_error":
+            raise TurnFailed("processing_error")
+        elif kind == "no_speech_detected":
+            raise TurnFailed("no_speech")
+        elif kind in done_types:
+            if ttfa is None:
+                raise TurnFailed("no_audio")
+            return now, ttfa
+
+
+async def turn_voice_realtime(ws, index, args):
+    trailing = math.ceil(args.vad_trailing_ms / FRAME_MS)
+    trailing += -trailing % FRAMES_PER_MESSAGE
+    pcm = pcm_utterance(index, trailing_frames=trailing)
+    step = SAMPLE_RATE * FRAME_MS // 1000 * 2 * FRAMES_PER_MESSAGE
+    for offset in range(0, len(pcm), step):
+        await ws.send(pcm[offset:offset + step])
+    # The utterance is over once the last frame is sent; the VAD closes it
+    return await wait_for_turn(ws, time.monotonic(), {"processing_complete"})
+
+
+async def turn_voice_stream(ws, index, args):
+    audio = wav_utterance(index)
+    started = time.monotonic()
+    await ws.send(audio)
+    return await wait_for_turn(ws, started, {"audio_complete"})
+
+
+class TurnFailed(Exception):
+    pass
+
+
+async def run_http_client(scenario, base_url, client_id, args, results):
+    turn = turn_voice_chat if scenario == "voice-chat" else turn_tts
+    timeout = httpx.Timeout(args.turn_timeout)
+    async with httpx.AsyncClient(timeout=timeout) as http:
+        for n in range(args.turns):
+            index = (client_id * args.turns + n) % args.utterances
+            try:
+                latency, ttfa = await turn(http, base_url, index, args)
+                results.ok(latency, ttfa)
+            except TurnFailed as e:
+                results.fail(str(e))
+            except httpx.HTTPError as e:
+                results.fail(type(e).__name__)
+
+
+async def run_ws_client(scenario, ws_url, client_id, args, results):
+    path = "/ws/voice-realtime" if scenario == "voice-realtime" else "/ws/voice-stream"
+    query = "audio=binary"
+    if scenario == "voice-realtime":
+        query += f"&format=pcm16&rate={SAMPLE_RATE}"
+    if args.stream_reply:
+        query += "&stream=true"
+    turn = turn_voice_realtime if scenario == "voice-realtime" else turn_voice_stream
+
+    n = 0
+    while n < args.turns:
+        # A socket the backend closed (or a timed-out turn) costs that turn, not the rest
+        n += 1
+        try:
+            async with websockets.connect(f"{ws_url}{path}?{query}", max_size=None) as ws:
+                json.loads(await ws.recv())  # protocol info
+                while True:
+                    index = (client_id * args.turns + n) % args.utterances
+                    try:
+                        latency, ttfa = await asyncio.wait_for(turn(ws, index, args), args.turn_timeout)
+                        results.ok(latency, ttfa)
+                    except TurnFailed as e:
+                        results.fail(str(e))
+                    if n >= args.turns:
+                        break
+                    n += 1
+        except asyncio.TimeoutError:
+            results.fail("timeout")
+        except (OSError, websockets.WebSocketException) as e:
+            results.fail(type(e).__name__)
+
+
+# --- scenario runner -------------------------------------------------------
+
+async def run_scenario(scenario, args, workdir):
+    fake_port = free_port()
+    backend_port = free_port()
+
+    fake_args = [sys.executable, os.path.join(BENCH_DIR, "fake_upstreams.py"),
+                 "--port", str(fake_port), "--profile", args.profile,
+                 "--error-status", str(args.error_status)]
+    for name in ("stt", "tts", "chat"):
+        value = getattr(args, name)
+        if value:
+            fake_args += [f"--{name}", ",".join(str(part) for part in value)]
+    if args.token_delay is not None:
+        fake_args += ["--token-delay", str(args.token_delay)]
+    if args.tts_chunk_delay is not None:
+        fake_args += ["--tts-chunk-delay", str(args.tts_chunk_delay)]
+
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "sk-fake",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{fake_port}/v1",
+        "CHATBOT_URLS": json.dumps({"default": f"http://127.0.0.1:{fake_port}/api/chat"}),
+        "TTS_DISK_CACHE_DIR": os.path.join(workdir, f"tts_store_{scenario}"),
+        "REDIS_URL": "",
+        "LOG_LEVEL": "warning",
+        "VAD_TRAILING_SILENCE_MS": str(args.vad_trailing_ms),
+    }
+    env.update(args.env)
+
+    fake = Process(fake_args, env, os.path.join(workdir, f"fake_{scenario}.log"), BENCH_DIR)
+    backend = None
+    try:
+        await wait_until_up(f"http://127.0.0.1:{fake_port}/stats", fake)
+        backend = Process(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+             "--port", str(backend_port), "--log-level", "warning", "--ws-max-size", str(64 * 1024 * 1024)],
+            env, os.path.join(workdir, f"backend_{scenario}.log"), BACKEND_DIR
+        )
+        base_url = f"http://127.0.0.1:{backend_port}"
+        await wait_until_up(f"{base_url}/", backend)
+        baseline_rss, _ = read_memory(backend.pid)
+
+        results = Results()
+        if scenario in ("voice-chat", "tts"):
+            clients = [run_http_client(scenario, base_url, i, args, results) for i in range(args.clients)]
+        else:
+            ws_url = f"ws://127.0.0.1:{backend_port}"
+            clients = [run_ws_client(scenario, ws_url, i, args, results) for i in range(args.clients)]
+        started = time.monotonic()
+        await asyncio.gather(*clients)
+        elapsed = time.monotonic() - started
+
+        _, peak_rss = read_memory(backend.pid)
+        async with httpx.AsyncClient() as http:
+            upstream_calls = (await http.get(f"http://127.0.0.1:{fake_port}/stats")).json()
+    finally:
+        if backend:
+            backend.stop()
+        fake.stop()
+
+    return summarize(scenario, results, elapsed, baseline_rss, peak_rss, upstream_calls)
+
+
+def summarize(scenario, results, elapsed, baseline_rss, peak_rss, upstream_calls):
+    def ms(value):
+        return round(value * 1000, 1) if value is not None else None
+
+    return {
+        "scenario": scenario,
+        "turns": len(results.latencies),
+        "errors": results.errors,
+        "error_kinds": results.error_kinds,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_per_s": round(len(results.latencies) / elapsed, 2) if elapsed else 0,
+        "latency_ms": {f"p{q}": ms(percentile(results.latencies, q)) for q in (50, 95, 99)},
+        "latency_mean_ms": ms(statistics.fmean(results.latencies)) if results.latencies else None,
+        "ttfa_ms": {f"p{q}": ms(percentile(results.ttfa, q)) for q in (50, 95, 99)},
+        "rss_baseline_mib": round(baseline_rss, 1) if baseline_rss else None,
+        "rss_peak_mib": round(peak_rss, 1) if peak_rss else None,
+        "upstream_calls": upstream_calls,
+    }
+
+
+def print_report(reports):
+    def cell(value, width):
+        return f"{value:>{width}.0f}" if value is not None else f"{'-':>{width}}"
+
+    print(f"{'scenario':<15} {'turns':>6} {'errors':>6} {'turns/s':>8} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'ttfa p50':>9} {'ttfa p95':>9} "
+          f"{'ttfa p99':>9} {'rss peak':>9}")
+    for report in reports:
+        latency, ttfa = report["latency_ms"], report["ttfa_ms"]
+        peak = report["rss_peak_mib"]
+        print(f"{report['scenario']:<15} {report['turns']:>6} {report['errors']:>6} "
+              f"{report['throughput_per_s']:>8.2f} {cell(latency['p50'], 7)} {cell(latency['p95'], 7)} "
+              f"{cell(latency['p99'], 7)} {cell(ttfa['p50'], 9)} {cell(ttfa['p95'], 9)} "
+              f"{cell(ttfa['p99'], 9)} {(f'{peak:.0f}MiB' if peak else '-'):>9}")
+    for report in reports:
+        if report["error_kinds"]:
+            print(f"  {report['scenario']} errors: {report['error_kinds']}")
+
+
+def parse_env(value):
+    key, sep, setting = value.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError("expected KEY=VALUE")
+    return key, setting
+
+
+async def run(args):
+    reports = []
+    with tempfile.TemporaryDirectory(prefix="voice-bench-") as workdir:
+        for scenario in args.scenario or SCENARIOS:
+            try:
+                reports.append(await run_scenario(scenario, args, workdir))
+            except RuntimeError as e:
+                print(f"{scenario}: {e}", file=sys.stderr)
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="run only this scenario (repeatable); default: all")
+    parser.add_argument("--clients", type=int, default=10, help="concurrent simulated callers")
+    parser.add_argument("--turns", type=int, default=5, help="turns per caller")
+    parser.add_argument("--utterances", type=int, default=16,
+                        help="distinct utterances/texts in rotation; fewer means more cache hits")
+    parser.add_argument("--stream-reply", action="store_true", help="connect WebSockets with ?stream=true")
+    parser.add_argument("--turn-timeout", type=float, default=60.0)
+    parser.add_argument("--vad-trailing-ms", type=int, default=700)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="typical",
+                        help="fake upstream latency profile")
+    parser.add_argument("--stt", type=parse_profile, help="base,jitter,error_rate override")
+    parser.add_argument("--tts", type=parse_profile, help="base,jitter,error_rate override")
+    parser.add_argument("--chat", type=parse_profile, help="base,jitter,error_rate override")
+    parser.add_argument("--token-delay", type=float, help="seconds between streamed chatbot tokens")
+    parser.add_argument("--tts-chunk-delay", type=float, help="seconds between streamed speech chunks")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--env", type=parse_env, action="append", default=[],
+                        help="extra backend environment, KEY=VALUE (repeatable)")
+    parser.add_argument("--json", help="also write the full results to this file")
+    args = parser.parse_args()
+    args.env = dict(args.env)
+
+    reports = asyncio.run(run(args))
+    print_report(reports)
+    if args.json:
+        with open(args.json, "w") as out:
+            json.dump({"settings": {k: v for k, v in vars(args).items() if k != "json"},
+                       "results": reports}, out, indent=2)
+
+
+if __name__ == "__main__":
+    main()
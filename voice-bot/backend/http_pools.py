@@ -0,0 +1,146 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import httpx
+
+from voice_logging import log
+
+try:
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Concurrent requests multiplexed over one HTTP/2 connection
+H2_STREAMS_PER_CONNECTION = 100
+
+
+def origin_of(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class BackendPool:
+    """httpx client for one backend origin, with pool-wait accounting.
+
+    Requests pass a semaphore sized to what the connection pool can carry, so
+    time spent waiting for a free connection is measured here instead of
+    disappearing inside httpx.
+    """
+
+    def __init__(self, origin, max_connections=50, max_keepalive=20, http2=False,
+                 timeout=30.0, connect_timeout=5.0):
+        self.origin = origin
+        self.http2 = http2
+        self.max_connections = max_connections
+        self.max_requests = max_connections * (H2_STREAMS_PER_CONNECTION if http2 else 1)
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_keepalive_connections=max_keepalive,
+                max_connections=max_connections
+            ),
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            follow_redirects=True,
+            http2=http2
+        )
+        self._slots = asyncio.Semaphore(self.max_requests)
+        self.in_flight = 0
+        self.waiting = 0
+        self.requests = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @asynccontextmanager
+    async def _checkout(self):
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        wait = time.monotonic() - start
+        self.requests += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        if wait > 0.001:
+            self.waited += 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    async def post(self, url, **kwargs):
+        async with self._checkout():
+            return await self.client.post(url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method, url, **kwargs):
+        async with self._checkout():
+            async with self.client.stream(method, url, **kwargs) as response:
+                yield response
+
+    async def warm_up(self, connections, timeout=2.0):
+        """Open `connections` keepalive connections before the first real request"""
+        async def touch():
+            try:
+                await self.client.request("HEAD", self.origin + "/", timeout=timeout)
+            except httpx.HTTPError:
+                pass
+        await asyncio.gather(*(touch() for _ in range(connections)))
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def stats(self):
+        return {
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "requests": self.requests,
+            "requests_waited": self.waited,
+            "avg_wait_ms": round(1000 * self.total_wait / self.requests, 2) if self.requests else 0,
+            "max_wait_ms": round(1000 * self.max_wait, 2)
+        }
+
+
+class PoolRegistry:
+    """One BackendPool per backend origin, so tenants don't starve each other.
+
+    `overrides` maps an origin to BackendPool keyword arguments, e.g.
+    {"http://localhost:8002": {"max_connections": 100, "http2": true}}.
+    """
+
+    def __init__(self, overrides=None, **defaults):
+        self.defaults = defaults
+        self.overrides = overrides or {}
+        self._pools = {}
+
+    def get(self, url):
+        origin = origin_of(url)
+        pool = self._pools.get(origin)
+        if pool is None:
+            settings = {**self.defaults, **self.overrides.get(origin, {})}
+            if settings.get("http2") and not HTTP2_AVAILABLE:
+                log.warning("http2_unavailable", origin=origin)
+                settings["http2"] = False
+            pool = self._pools[origin] = BackendPool(origin, **settings)
+        return pool
+
+    async def warm_up(self, urls, connections, timeout=2.0):
+        origins = {origin_of(url): url for url in urls}
+        await asyncio.gather(*(
+            self.get(url).warm_up(connections, timeout) for url in origins.values()
+        ))
+
+    async def aclose(self):
+        for pool in self._pools.values():
+            await pool.aclose()
+
+    def stats(self):
+        return {origin: pool.stats() for origin, pool in self._pools.items()}
@@ -1,8 +1,9 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile, WebSocket
+from fastapi import FastAPI, HTTPException, File, Request, UploadFile, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 import openai
+from openai.types.audio import Transcription
 
 # Request models
 class ChatRequest(BaseModel):
@@ -14,19 +15,52 @@ class RelayRequest(BaseModel):
     bot_id: str = "default"
 import os
 from dotenv import load_dotenv
+from voice_logging import configure_logging, log, logging_stats, shutdown_logging
 import httpx
 import json
 import io
-import base64
 import re
 import unicodedata
 import asyncio
 import hashlib
 import time
-# import redis.asyncio as redis  # Commented out for now
+from tts_cache import LRUByteCache
+from audio_store import DiskAudioStore
+from redis_cache import RedisAudioCache
+from singleflight import SingleFlight
+from streaming_text import SentenceAccumulator, extract_stream_text, segment_text
+from audio_buffer import AudioBuffer, BufferReader, FileReader
+from vad import Endpointer
+from audio_preprocess import pcm16_to_wav, prepare_for_stt
+from partial_stt import build_partial_window, normalize_transcript, stable_prefix
+from concurrent.futures import ThreadPoolExecutor
+from ws_protocol import send_audio, send_protocol_info
+from tts_scheduler import PRIORITY_FIRST_AUDIO, PRIORITY_STREAM_CHUNK
+from admission import UpstreamLimiter, read_ahead, retry_after_seconds
+from backend_health import BackendRegistry, BackendUnavailable
+from http_pools import PoolRegistry
+from answer_cache import normalize_question
+from metrics import registry as metrics_registry
+from metrics import bind_endpoint, current_turn, record_stage, start_turn, timed_stage
+from voice_session import VoiceSession, session_stats
+from ws_sender import WebSocketSender, sender_stats
+from uploads import (
+    MULTIPART_OVERHEAD, UploadLimitMiddleware, file_digest, inspect_upload, prepare_wav_upload
+)
+from tts_stream import StreamFlights, audio_etag, etag_matches, parse_byte_range
 
 load_dotenv()
 
+# Structured JSON logs written from a background thread. Transcripts, bot
+# replies and request payloads are redacted unless LOG_PAYLOADS=true;
+# LOG_SAMPLE_RATES='{"debug": 0.05, "info": 0.5}' keeps a fraction per level.
+configure_logging(
+    level=os.getenv("LOG_LEVEL", "info").lower(),
+    sample_rates=json.loads(os.getenv("LOG_SAMPLE_RATES", "{}")),
+    log_payloads=os.getenv("LOG_PAYLOADS", "false").lower() == "true",
+    queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+)
+
 app = FastAPI(title="Voice Backend Service")
 
 app.add_middleware(
@@ -37,9 +71,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-client = openai.OpenAI(
+# Async OpenAI client with its own connection pool so STT/TTS calls never
+# block the event loop. Pool limits are tunable per deployment.
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "20"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30.0"))
+
+openai_http_client = httpx.AsyncClient(
+    limits=httpx.Limits(
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+        max_connections=OPENAI_MAX_CONNECTIONS
+    ),
+    timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=5.0)
+)
+
+client = openai.AsyncOpenAI(
     api_key=os.getenv("OPENAI_API_KEY"),
-    timeout=30.0
+    timeout=OPENAI_TIMEOUT,
+    http_client=openai_http_client
 )
 
 # Multiple chatbots configuration
@@ -50,28 +99,180 @@ CHATBOT_URLS = {
     "edmonds": "http://localhost:8000/api/chat",
     "default": "http://localhost:8000/api/chat"
 }
+# Override or add backends without editing code, e.g.
+# CHATBOT_URLS='{"default": "http://127.0.0.1:9100/api/chat"}'
+CHATBOT_URLS.update(json.loads(os.getenv("CHATBOT_URLS", "{}")))
+
+# Default TTS voice settings; override per bot with the BOT_TTS_CONFIG env var,
+# e.g. BOT_TTS_CONFIG='{"project2": {"model": "tts-1", "voice": "alloy"}}'
+DEFAULT_TTS_CONFIG = {
+    "model": "tts-1-hd",
+    "voice": "nova",
+    "response_format": "mp3",
+    "speed": 1.0
+}
+BOT_TTS_CONFIG = json.loads(os.getenv("BOT_TTS_CONFIG", "{}"))
+
+AUDIO_MEDIA_TYPES = {
+    "mp3": "audio/mpeg",
+    "opus": "audio/ogg",
+    "aac": "audio/aac",
+    "flac": "audio/flac",
+    "wav": "audio/wav",
+    "pcm": "audio/L16"
+}
+
+# Cached /tts clips are served with an ETag and this max-age, so browsers and
+# CDNs can keep stock phrases (GET /tts?text=...) without asking again
+TTS_HTTP_MAX_AGE = int(os.getenv("TTS_HTTP_MAX_AGE", "86400"))
 
-# Redis configuration - Disabled for now
-# redis_client = redis.Redis(
-#     host="redis-15221.c16.us-east-1-2.ec2.redns.redis-cloud.com",
-#     port=15221,
-#     password=os.getenv("REDIS_PASSWORD"),
-#     decode_responses=True
-# )
+# Chatbot backend health: a backend that keeps failing is skipped (straight to
+# the fallback answers) for CHATBOT_BREAKER_RESET_SECONDS, and request timeouts
+# follow its observed p99 latency within [CHATBOT_MIN_TIMEOUT, CHATBOT_MAX_TIMEOUT].
+# Optional hedging: CHATBOT_HEDGE_URLS='{"default": "http://backup:8000/api/chat"}'
+# sends the same question to the secondary once the primary exceeds its p95.
+CHATBOT_HEDGE_URLS = json.loads(os.getenv("CHATBOT_HEDGE_URLS", "{}"))
+chatbot_backends = BackendRegistry(
+    failure_threshold=int(os.getenv("CHATBOT_BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.getenv("CHATBOT_BREAKER_RESET_SECONDS", "30")),
+    min_timeout=float(os.getenv("CHATBOT_MIN_TIMEOUT", "2.0")),
+    max_timeout=float(os.getenv("CHATBOT_MAX_TIMEOUT", "30.0")),
+    hedge_delay=float(os.getenv("CHATBOT_HEDGE_DELAY", "2.0"))
+)
+
+# Shared Redis tier for TTS audio - disabled unless REDIS_URL is set
+# (use "memory://" for an in-process stand-in during local runs)
+REDIS_URL = os.getenv("REDIS_URL", "")
 
 # Performance optimizations
-tts_cache = {}
-CACHE_MAX_SIZE = 100
+CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
 CACHE_TTL = 1296000  # 15 days
 MAX_TTS_LENGTH = 2500
+tts_cache = LRUByteCache(max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL)
+
+# Chatbot answers per bot, keyed on the normalized question; clear a bot's
+# entries with DELETE /chat-cache/{bot_id} after its content changes
+CHAT_CACHE_MAX_BYTES = int(os.getenv("CHAT_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+CHAT_CACHE_TTL = int(os.getenv("CHAT_CACHE_TTL", "3600"))
+# Opt-in: dropping filler words merges more phrasings but can also merge
+# questions that only differ in those words ("can I" vs "can you")
+CHAT_CACHE_STRIP_STOPWORDS = os.getenv("CHAT_CACHE_STRIP_STOPWORDS", "false").lower() == "true"
+answer_cache = LRUByteCache(max_bytes=CHAT_CACHE_MAX_BYTES, ttl=CHAT_CACHE_TTL)
+
+# Persistent TTS store shared by all workers; set TTS_DISK_CACHE_DIR="" to disable
+# (relative paths resolve against this directory, not the launch directory)
+TTS_DISK_CACHE_DIR = os.getenv("TTS_DISK_CACHE_DIR", "tts_store")
+TTS_DISK_CACHE_MAX_BYTES = int(os.getenv("TTS_DISK_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+tts_disk_store = (
+    DiskAudioStore(
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), TTS_DISK_CACHE_DIR),
+        ttl=CACHE_TTL,
+        max_bytes=TTS_DISK_CACHE_MAX_BYTES
+    )
+    if TTS_DISK_CACHE_DIR else None
+)
+# Disk lookups, writes and evictions run here, off the event loop. Disk hits
+# are mmaps served once and dropped; TTS_DISK_PROMOTE=true also copies them
+# into the in-memory LRU (faster repeats, but the clip lands on the heap).
+TTS_DISK_PROMOTE = os.getenv("TTS_DISK_PROMOTE", "false").lower() == "true"
+tts_disk_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tts-disk")
+
+redis_cache = (
+    RedisAudioCache.from_url(
+        REDIS_URL,
+        ttl=CACHE_TTL,
+        password=os.getenv("REDIS_PASSWORD"),
+        socket_timeout=float(os.getenv("REDIS_TIMEOUT", "0.5")),
+        compress=os.getenv("REDIS_TTS_COMPRESSION", "none") == "zlib"
+    )
+    if REDIS_URL else None
+)
+
+# Hard cap on one recorded utterance held in memory per connection
+MAX_UTTERANCE_BYTES = int(os.getenv("MAX_UTTERANCE_BYTES", str(10 * 1024 * 1024)))
+
+# Uploads to /stt and /voice-chat: bodies over STT_MAX_UPLOAD_BYTES are refused
+# before they are read, and WAV recordings over STT_MAX_UPLOAD_SECONDS before
+# any upstream call. Starlette keeps the first 1 MiB of each uploaded file in
+# memory while it is parsed; the rest spills to a temporary file.
+STT_MAX_UPLOAD_BYTES = int(os.getenv("STT_MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+STT_MAX_UPLOAD_SECONDS = float(os.getenv("STT_MAX_UPLOAD_SECONDS", "300"))
+app.add_middleware(
+    UploadLimitMiddleware,
+    paths={"/stt", "/voice-chat"},
+    max_bytes=STT_MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD
+)
 
-# Connection pooling for faster API calls
-connection_pool = httpx.AsyncClient(
-    limits=httpx.Limits(max_keepalive_connections=5, max_connections=20),
-    timeout=httpx.Timeout(30.0, connect=5.0, read=30.0),
-    follow_redirects=True
+# Server-side endpointing for /ws/voice-realtime. PCM/WAV input is closed
+# after VAD_TRAILING_SILENCE_MS of silence; undecodable input (WebM/Opus)
+# keeps the fixed FALLBACK_RECORDING_SECONDS recording.
+VAD_TRAILING_SILENCE_MS = int(os.getenv("VAD_TRAILING_SILENCE_MS", "700"))
+VAD_MIN_DURATION_MS = int(os.getenv("VAD_MIN_DURATION_MS", "500"))
+VAD_MAX_DURATION_MS = int(os.getenv("VAD_MAX_DURATION_MS", "15000"))
+VAD_NO_SPEECH_TIMEOUT_MS = int(os.getenv("VAD_NO_SPEECH_TIMEOUT_MS", "5000"))
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "-45"))
+FALLBACK_RECORDING_SECONDS = float(os.getenv("FALLBACK_RECORDING_SECONDS", "3.0"))
+
+# Incremental STT while the user is still talking (opt in with ?partials=true)
+PARTIAL_TRANSCRIPT_INTERVAL = float(os.getenv("PARTIAL_TRANSCRIPT_INTERVAL", "1.0"))
+PARTIAL_WINDOW_SECONDS = float(os.getenv("PARTIAL_WINDOW_SECONDS", "8.0"))
+
+# New speech cancels the previous turn's reply (barge-in). Undecodable input
+# has no VAD, so it counts as speech after BARGE_IN_MIN_SECONDS of recording.
+BARGE_IN_MIN_SECONDS = float(os.getenv("BARGE_IN_MIN_SECONDS", "0.5"))
+
+# Outbound WebSocket queue: audio a client hasn't read yet is capped at
+# WS_SEND_QUEUE_MAX_BYTES, then WS_SLOW_CONSUMER_POLICY (drop | coalesce | disconnect)
+WS_SEND_QUEUE_MAX_BYTES = int(os.getenv("WS_SEND_QUEUE_MAX_BYTES", str(2 * 1024 * 1024)))
+WS_SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", "drop")
+
+# Worker pool for NumPy audio preprocessing so it never runs on the event loop
+STT_PREPROCESS_WORKERS = int(os.getenv("STT_PREPROCESS_WORKERS", "4"))
+preprocess_pool = ThreadPoolExecutor(
+    max_workers=STT_PREPROCESS_WORKERS,
+    thread_name_prefix="stt-preprocess"
+)
+
+# Connection pools for chatbot backends, one per origin so a busy tenant can't
+# starve the others. Per-origin overrides go in CHATBOT_POOL_LIMITS, e.g.
+# CHATBOT_POOL_LIMITS='{"http://localhost:8002": {"max_connections": 100, "http2": true}}'
+# (HTTP/2 needs the h2 package). CHATBOT_POOL_WARMUP keepalive connections per
+# origin are opened at startup.
+CHATBOT_POOL_WARMUP = int(os.getenv("CHATBOT_POOL_WARMUP", "2"))
+chatbot_pools = PoolRegistry(
+    overrides=json.loads(os.getenv("CHATBOT_POOL_LIMITS", "{}")),
+    max_connections=int(os.getenv("CHATBOT_POOL_MAX_CONNECTIONS", "50")),
+    max_keepalive=int(os.getenv("CHATBOT_POOL_MAX_KEEPALIVE", "20")),
+    http2=os.getenv("CHATBOT_HTTP2", "false").lower() == "true"
 )
 
+# In-flight deduplication of identical upstream STT/TTS calls
+tts_flights = SingleFlight()
+tts_streams = StreamFlights()  # streamed /tts misses, fanned out to identical requests
+stt_flights = SingleFlight()
+
+# Process-wide admission control for upstream calls. *_RATE_PER_MINUTE should
+# match the provider quota (0 = no rate limit); interactive work is admitted
+# ahead of later stream chunks, partial transcripts and speculative replies.
+STT_MAX_CONCURRENCY = int(os.getenv("STT_MAX_CONCURRENCY", "8"))
+STT_RATE_PER_MINUTE = float(os.getenv("STT_RATE_PER_MINUTE", "0"))
+TTS_MAX_CONCURRENCY = int(os.getenv("TTS_MAX_CONCURRENCY", "16"))
+TTS_RATE_PER_MINUTE = float(os.getenv("TTS_RATE_PER_MINUTE", "0"))
+CHAT_MAX_CONCURRENCY = int(os.getenv("CHAT_MAX_CONCURRENCY", "32"))
+CHAT_RATE_PER_MINUTE = float(os.getenv("CHAT_RATE_PER_MINUTE", "0"))
+stt_limiter = UpstreamLimiter("stt", STT_MAX_CONCURRENCY, STT_RATE_PER_MINUTE)
+tts_limiter = UpstreamLimiter("tts", TTS_MAX_CONCURRENCY, TTS_RATE_PER_MINUTE)
+chat_limiter = UpstreamLimiter("chat", CHAT_MAX_CONCURRENCY, CHAT_RATE_PER_MINUTE)
+
+# Concurrent TTS calls per streamed reply
+TTS_STREAM_CONCURRENCY = int(os.getenv("TTS_STREAM_CONCURRENCY", "3"))
+
+# Adaptive streaming chunks: small first chunk for time-to-first-audio,
+# then chunks grow by STREAM_CHUNK_GROWTH up to STREAM_MAX_CHUNK_SIZE
+STREAM_FIRST_CHUNK_SIZE = int(os.getenv("STREAM_FIRST_CHUNK_SIZE", "60"))
+STREAM_MAX_CHUNK_SIZE = int(os.getenv("STREAM_MAX_CHUNK_SIZE", "500"))
+STREAM_CHUNK_GROWTH = float(os.getenv("STREAM_CHUNK_GROWTH", "1.5"))
+
 # Precompute common responses
 COMMON_RESPONSES = {
     "hello": "Hello! How can I help you today?",
@@ -81,29 +282,92 @@ COMMON_RESPONSES = {
     
 }
 
-def get_cache_key(text):
-    return hashlib.md5(text.encode()).hexdigest()
+def get_cache_namespace(bot_id):
+    # Unknown bot ids share the default namespace so they can't grow the stats unbounded
+    if bot_id in CHATBOT_URLS or bot_id in BOT_TTS_CONFIG:
+        return bot_id
+    return "default"
 
-def get_cached_tts(text):
-    cache_key = get_cache_key(text)
-    if cache_key in tts_cache:
-        cached_item = tts_cache[cache_key]
-        if time.time() - cached_item['timestamp'] < CACHE_TTL:
-            return cached_item['audio']
-        else:
-            del tts_cache[cache_key]
-    return None
+def get_tts_config(bot_id="default"):
+    return {**DEFAULT_TTS_CONFIG, **BOT_TTS_CONFIG.get(get_cache_namespace(bot_id), {})}
 
-def cache_tts(text, audio_content):
-    if len(tts_cache) >= CACHE_MAX_SIZE:
-        oldest_key = min(tts_cache.keys(), key=lambda k: tts_cache[k]['timestamp'])
-        del tts_cache[oldest_key]
-    
-    cache_key = get_cache_key(text)
-    tts_cache[cache_key] = {
-        'audio': audio_content,
-        'timestamp': time.time()
-    }
+def get_cache_key(text, bot_id="default"):
+    """Hash of everything that affects the synthesized audio, not just the text"""
+    config = get_tts_config(bot_id)
+    synthesis_key = [
+        text,
+        config["model"],
+        config["voice"],
+        config["response_format"],
+        float(config["speed"])
+    ]
+    return hashlib.sha256(json.dumps(synthesis_key).encode()).hexdigest()
+
+async def get_cached_tts(text, bot_id="default"):
+    cache_key = get_cache_key(text, bot_id)
+    namespace = get_cache_namespace(bot_id)
+    audio_content = tts_cache.get(cache_key, namespace)
+    if audio_content is None and tts_disk_store:
+        audio_content = await asyncio.get_running_loop().run_in_executor(
+            tts_disk_pool, tts_disk_store.get, cache_key
+        )
+        if audio_content is not None and TTS_DISK_PROMOTE:
+            with audio_content:
+                audio_content = bytes(audio_content)
+            tts_cache.set(cache_key, audio_content, namespace)
+    return audio_content
+
+def cache_tts(text, audio_content, bot_id="default"):
+    cache_key = get_cache_key(text, bot_id)
+    tts_cache.set(cache_key, audio_content, get_cache_namespace(bot_id))
+    if tts_disk_store:
+        write = asyncio.get_running_loop().run_in_executor(
+            tts_disk_pool, tts_disk_store.put, cache_key, bytes(audio_content)
+        )
+        write.add_done_callback(_log_disk_write_failure)
+
+def _log_disk_write_failure(write):
+    if not write.cancelled() and write.exception() is not None:
+        log.warning("tts_disk_cache_write_failed", error=str(write.exception()))
+
+def get_answer_cache_key(message, bot_id="default"):
+    question = normalize_question(message, CHAT_CACHE_STRIP_STOPWORDS)
+    return f"{get_cache_namespace(bot_id)}:{question}" if question else None
+
+def get_cached_answer(message, bot_id="default"):
+    cache_key = get_answer_cache_key(message, bot_id)
+    if not cache_key or not CHAT_CACHE_TTL:
+        return None
+    answer = answer_cache.get(cache_key, get_cache_namespace(bot_id))
+    return answer.decode() if answer is not None else None
+
+def cache_answer(message, answer, bot_id="default"):
+    """Only real backend answers are cached, never the keyword fallbacks"""
+    cache_key = get_answer_cache_key(message, bot_id)
+    if cache_key and isinstance(answer, str) and answer and CHAT_CACHE_TTL:
+        answer_cache.set(cache_key, answer.encode(), get_cache_namespace(bot_id))
+
+def create_sender(websocket):
+    """Route everything sent on an accepted socket through one bounded writer"""
+    return WebSocketSender(websocket, WS_SEND_QUEUE_MAX_BYTES, WS_SLOW_CONSUMER_POLICY)
+
+def create_endpointer(websocket):
+    """VAD endpointer for a socket; raw PCM clients pass ?format=pcm16&rate=16000"""
+    params = websocket.query_params
+    sample_rate = None
+    channels = 1
+    if params.get("format") == "pcm16":
+        sample_rate = int(params.get("rate", "16000"))
+        channels = int(params.get("channels", "1"))
+    return Endpointer(
+        sample_rate=sample_rate,
+        channels=channels,
+        threshold_db=VAD_THRESHOLD_DB,
+        min_duration_ms=VAD_MIN_DURATION_MS,
+        trailing_silence_ms=VAD_TRAILING_SILENCE_MS,
+        max_duration_ms=VAD_MAX_DURATION_MS,
+        no_speech_timeout_ms=VAD_NO_SPEECH_TIMEOUT_MS
+    )
 
 def optimize_text_for_tts(text):
     if len(text) <= MAX_TTS_LENGTH:
@@ -139,45 +403,116 @@ def clean_text_for_tts(text):
         return ascii_text
         
     except Exception as e:
-        print(f"Cleaning error: {e}")
+        log.warning("tts_text_cleaning_failed", error=str(e))
         return "There was a text processing error."
 
-async def get_chatbot_response(message, bot_id="default"):
+async def _post_chatbot(url, payload):
+    """POST to one chatbot backend, recording the outcome for its circuit breaker"""
+    health = chatbot_backends.get(url)
+    if not health.allow_request():
+        raise BackendUnavailable(url)
+    
+    timeout = health.timeout()
+    start = time.monotonic()
+    try:
+        response = await chatbot_pools.get(url).post(
+            url,
+            json=payload,
+            headers={"Content-Type": "application/json"},
+            timeout=httpx.Timeout(timeout, connect=min(5.0, timeout))
+        )
+    except asyncio.CancelledError:
+        health.release()
+        raise
+    except Exception:
+        health.record_failure()
+        raise
+    
+    if response.status_code >= 500 or response.status_code == 429:
+        health.record_failure()
+    else:
+        health.record_success(time.monotonic() - start)
+    return response
+
+async def post_chatbot(bot_id, payload):
+    """POST to the bot's backend, hedging to CHATBOT_HEDGE_URLS after its p95 latency"""
+    primary = CHATBOT_URLS.get(bot_id, CHATBOT_URLS["default"])
+    secondary = CHATBOT_HEDGE_URLS.get(bot_id, CHATBOT_HEDGE_URLS.get("default"))
+    if not secondary or secondary == primary:
+        return await _post_chatbot(primary, payload)
+    
+    def usable(task):
+        return not task.exception() and task.result().status_code == 200
+    
+    tasks = [asyncio.create_task(_post_chatbot(primary, payload))]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=chatbot_backends.get(primary).hedge_delay())
+        if done and usable(tasks[0]):
+            return tasks[0].result()
+        
+        # Primary is slow or already failed: race the secondary
+        chatbot_backends.hedged += 1
+        tasks.append(asyncio.create_task(_post_chatbot(secondary, payload)))
+        pending = {task for task in tasks if not task.done()}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if usable(task):
+                    if task is tasks[1]:
+                        chatbot_backends.hedge_wins += 1
+                    return task.result()
+        
+        # Neither worked; report the primary's outcome
+        return tasks[0].result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+@timed_stage("chatbot")
+async def get_chatbot_response(message, bot_id="default", priority=PRIORITY_FIRST_AUDIO):
     message_lower = message.lower().strip()
     
     # Get chatbot URL based on bot_id
     chatbot_url = CHATBOT_URLS.get(bot_id, CHATBOT_URLS["default"])
-    print(f"Using chatbot URL for bot_id '{bot_id}': {chatbot_url}")
+    log.debug("chatbot_backend_selected", bot_id=bot_id, url=chatbot_url)
     
     # Fast common responses first
-    for key, response in COMMON_RESPONSES.items():
-        if key in message_lower:
-            return response
+    common_response = get_common_response(message_lower)
+    if common_response:
+        return common_response
+    
+    cached_answer = get_cached_answer(message, bot_id)
+    if cached_answer:
+        return cached_answer
     
     # Try chatbot API - test different payload formats
     try:
         # First try with simple message payload
         payload = {"message": message}
         
-        print(f"Calling chatbot API with payload: {payload}")
+        log.debug("chatbot_request", bot_id=bot_id, payload=payload)
         
-        # Direct API call without timeout wrapper
-        response = await connection_pool.post(
-            chatbot_url,
-            json=payload,
-            headers={"Content-Type": "application/json"}
-        )
+        # Timeout adapts to the backend's recent latency
+        async with chat_limiter.slot(priority):
+            response = await post_chatbot(bot_id, payload)
         
-        print(f"Chatbot API response status: {response.status_code}")
-        print(f"Response headers: {dict(response.headers)}")
+        log.debug("chatbot_response", bot_id=bot_id, status=response.status_code,
+                  headers=dict(response.headers))
         
         if response.status_code == 200:
             result = response.json()
-            print(f"Chatbot API response: {result}")
-            return result.get("response", result.get("answer", "I received your message and I'm processing it."))
+            log.debug("chatbot_answer", bot_id=bot_id, body=result)
+            answer = result.get("response", result.get("answer"))
+            cache_answer(message, answer, bot_id)
+            return answer or "I received your message and I'm processing it."
         else:
             response_text = response.text
-            print(f"Chatbot API error: {response.status_code} - {response_text}")
+            log.warning("chatbot_api_error", bot_id=bot_id, status=response.status_code, body=response_text)
+            if response.status_code == 429:
+                chat_limiter.throttle(retry_after_seconds(response.headers))
+            if response.status_code >= 500 or response.status_code == 429:
+                # Backend trouble rather than a payload problem; a second POST won't help
+                return get_fallback_response(message_lower)
             
             # Try with session_id if first attempt fails
             import uuid
@@ -187,28 +522,38 @@ async def get_chatbot_response(message, bot_id="default"):
                 "session_id": session_id
             }
             
-            print(f"Retrying with session_id: {payload_with_session}")
+            log.info("chatbot_retry_with_session", bot_id=bot_id, payload=payload_with_session)
             
-            response2 = await connection_pool.post(
-                chatbot_url,
-                json=payload_with_session,
-                headers={"Content-Type": "application/json"}
-            )
+            async with chat_limiter.slot(priority):
+                response2 = await post_chatbot(bot_id, payload_with_session)
             
             if response2.status_code == 200:
                 result = response2.json()
-                print(f"Chatbot API response (retry): {result}")
-                return result.get("response", result.get("answer", "I received your message and I'm processing it."))
+                log.debug("chatbot_answer", bot_id=bot_id, body=result, retry=True)
+                answer = result.get("response", result.get("answer"))
+                cache_answer(message, answer, bot_id)
+                return answer or "I received your message and I'm processing it."
             else:
-                print(f"Retry also failed: {response2.status_code} - {response2.text}")
+                log.warning("chatbot_retry_failed", bot_id=bot_id, status=response2.status_code, body=response2.text)
             
+    except BackendUnavailable as e:
+        log.info("chatbot_circuit_open", url=str(e))
     except httpx.TimeoutException:
-        print("Chatbot API timeout - using fallback")
+        log.warning("chatbot_timeout", bot_id=bot_id)
     except httpx.ConnectError as e:
-        print(f"Chatbot API connection refused: {str(e)}")
+        log.warning("chatbot_connect_failed", bot_id=bot_id, error=str(e))
     except Exception as e:
-        print(f"Chatbot API unexpected error: {type(e).__name__}: {str(e)}")
+        log.error("chatbot_unexpected_error", bot_id=bot_id, error_type=type(e).__name__, error=str(e))
     
+    return get_fallback_response(message_lower)
+
+def get_common_response(message_lower):
+    for key, response in COMMON_RESPONSES.items():
+        if key in message_lower:
+            return response
+    return None
+
+def get_fallback_response(message_lower):
     # Enhanced fallback responses
     if any(word in message_lower for word in ["office", "hours", "open", "time"]):
         return "Our office hours are Monday to Friday 9 AM to 6 PM, and Saturday 9 AM to 2 PM. How can I help you?"
@@ -219,14 +564,144 @@ async def get_chatbot_response(message, bot_id="default"):
     else:
         return "Thank you for your question. For detailed information, please call our office at 425-775-5162."
 
+async def stream_chatbot_response(message, bot_id="default"):
+    """Yield the chatbot reply in pieces as the backend produces it.
+
+    Asks the backend to stream and understands SSE, NDJSON and chunked plain
+    text replies; a backend that ignores the flag and returns JSON still works,
+    the whole answer just arrives as a single piece.
+    """
+    message_lower = message.lower().strip()
+    
+    common_response = get_common_response(message_lower)
+    if common_response:
+        yield common_response
+        return
+    
+    cached_answer = get_cached_answer(message, bot_id)
+    if cached_answer:
+        yield cached_answer
+        return
+    
+    chatbot_url = CHATBOT_URLS.get(bot_id, CHATBOT_URLS["default"])
+    health = chatbot_backends.get(chatbot_url)
+    started = time.monotonic()
+    produced_text = False
+    backend_failed = False
+    outcome_recorded = False
+    pieces = []
+    
+    async def upstream():
+        # Runs under read_ahead, so the chat slot and the connection are freed
+        # when the backend finishes, not when TTS has caught up with the text
+        nonlocal produced_text, backend_failed, outcome_recorded
+        timeout = health.timeout()
+        async with chat_limiter.slot(PRIORITY_FIRST_AUDIO):
+            async with chatbot_pools.get(chatbot_url).stream(
+                "POST",
+                chatbot_url,
+                json={"message": message, "stream": True},
+                headers={
+                    "Content-Type": "application/json",
+                    "Accept": "text/event-stream, application/x-ndjson, application/json"
+                },
+                timeout=httpx.Timeout(timeout, connect=min(5.0, timeout))
+            ) as response:
+                # Time to first byte isn't comparable with full replies, so no latency sample
+                if response.status_code >= 500 or response.status_code == 429:
+                    health.record_failure()
+                else:
+                    health.record_success()
+                outcome_recorded = True
+                
+                if response.status_code != 200:
+                    log.warning("chatbot_stream_error", bot_id=bot_id, status=response.status_code)
+                    if response.status_code == 429:
+                        chat_limiter.throttle(retry_after_seconds(response.headers))
+                    backend_failed = True
+                else:
+                    content_type = response.headers.get("content-type", "")
+                    
+                    if "text/event-stream" in content_type:
+                        async for line in response.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                break
+                            text = extract_stream_text(data)
+                            if text:
+                                produced_text = True
+                                pieces.append(text)
+                                yield text
+                    elif "ndjson" in content_type:
+                        async for line in response.aiter_lines():
+                            text = extract_stream_text(line) if line.strip() else ""
+                            if text:
+                                produced_text = True
+                                pieces.append(text)
+                                yield text
+                    elif "application/json" in content_type:
+                        result = json.loads(await response.aread())
+                        produced_text = True
+                        text = result.get("response", result.get("answer"))
+                        if isinstance(text, str):
+                            pieces.append(text)
+                        yield text or "I received your message and I'm processing it."
+                    else:
+                        async for text in response.aiter_text():
+                            if text:
+                                produced_text = True
+                                pieces.append(text)
+                                yield text
+    
+    try:
+        if not health.allow_request():
+            raise BackendUnavailable(chatbot_url)
+        async for text in read_ahead(upstream()):
+            yield text
+        
+        if pieces and not backend_failed:
+            record_stage("chatbot", time.monotonic() - started)
+            cache_answer(message, "".join(pieces), bot_id)
+    
+    except BackendUnavailable as e:
+        log.info("chatbot_circuit_open", url=str(e))
+        outcome_recorded = True
+    except httpx.TimeoutException:
+        health.record_failure()
+        outcome_recorded = True
+        log.warning("chatbot_stream_timeout", bot_id=bot_id)
+    except httpx.ConnectError as e:
+        health.record_failure()
+        outcome_recorded = True
+        log.warning("chatbot_stream_connect_failed", bot_id=bot_id, error=str(e))
+    except Exception as e:
+        if not outcome_recorded:
+            health.record_failure()
+            outcome_recorded = True
+        log.error("chatbot_stream_unexpected_error", bot_id=bot_id, error_type=type(e).__name__, error=str(e))
+    finally:
+        # Cancelled, or the consumer closed us, before the backend answered:
+        # free a half-open probe slot so the next request can probe instead
+        if not outcome_recorded:
+            health.release()
+    
+    if not produced_text:
+        if backend_failed:
+            # Non-streaming path still knows how to retry with a session_id
+            yield await get_chatbot_response(message, bot_id)
+        else:
+            yield get_fallback_response(message_lower)
+
 # API Endpoints
 @app.get("/session-ephemeral")
 async def get_session_ephemeral(bot_id: str = "default"):
     """Create ephemeral OpenAI Realtime token"""
     try:
-        response = client.beta.realtime.sessions.create(
+        response = await client.beta.realtime.sessions.create(
             model="gpt-4o-realtime-preview-2024-10-01",
-            voice="nova"
+            voice=get_tts_config(bot_id)["voice"]
         )
         return {
             "client_secret": {
@@ -247,258 +722,674 @@ async def relay_message(request: RelayRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.delete("/chat-cache/{bot_id}")
+async def invalidate_chat_cache(bot_id: str, question: str = None):
+    """Drop cached chatbot answers for a bot, or for one of its questions"""
+    if question:
+        cache_key = get_answer_cache_key(question, bot_id)
+        removed = int(bool(cache_key) and answer_cache.delete(cache_key))
+    else:
+        removed = answer_cache.clear_namespace(get_cache_namespace(bot_id))
+    return {"bot_id": bot_id, "removed": removed}
+
 async def get_redis_cache(key):
-    # Redis disabled - return None
-    return None
+    if not redis_cache:
+        return None
+    return await redis_cache.get(key)
+
+async def get_redis_cache_many(keys):
+    if not redis_cache:
+        return [None] * len(keys)
+    return await redis_cache.get_many(keys)
 
 async def set_redis_cache(key, value):
-    # Redis disabled - do nothing
-    pass
+    if redis_cache:
+        await redis_cache.set(key, value)
 
-def split_text_for_streaming(text, chunk_size=100):
-    """Split text into chunks for streaming TTS"""
-    sentences = text.split('. ')
-    chunks = []
-    current_chunk = ""
-    
-    for sentence in sentences:
-        if len(current_chunk + sentence + '. ') <= chunk_size:
-            current_chunk += sentence + '. '
-        else:
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            current_chunk = sentence + '. '
-    
-    if current_chunk:
-        chunks.append(current_chunk.strip())
-    
-    return chunks
+def split_text_for_streaming(text, chunk_size=150):
+    """Split text into chunks for streaming TTS: short first chunk, growing after"""
+    return segment_text(
+        text,
+        first_chunk_size=STREAM_FIRST_CHUNK_SIZE,
+        chunk_size=chunk_size,
+        max_chunk_size=STREAM_MAX_CHUNK_SIZE,
+        growth=STREAM_CHUNK_GROWTH
+    )
+
+async def _synthesize_and_cache(text, cache_key, bot_id, priority):
+    config = get_tts_config(bot_id)
+    async with tts_limiter.slot(priority):
+        try:
+            response = await client.audio.speech.create(
+                model=config["model"],
+                voice=config["voice"],
+                response_format=config["response_format"],
+                speed=config["speed"],
+                input=text
+            )
+        except openai.RateLimitError as e:
+            tts_limiter.throttle(retry_after_seconds(e.response.headers))
+            raise
+    audio_content = response.content
+    await store_tts(text, audio_content, bot_id, cache_key)
+    return audio_content
+
+async def store_tts(text, audio_content, bot_id, cache_key):
+    # Cache in both Redis and local
+    cache_tts(text, audio_content, bot_id)
+    await set_redis_cache(cache_key, audio_content)
 
-async def generate_single_tts_chunk(chunk, chunk_index):
+async def stream_tts_upstream(text, bot_id="default"):
+    """Yield synthesized audio as the TTS API produces it"""
+    config = get_tts_config(bot_id)
+    started = time.monotonic()
+    async with tts_limiter.slot(PRIORITY_FIRST_AUDIO):
+        try:
+            async with client.audio.speech.with_streaming_response.create(
+                model=config["model"],
+                voice=config["voice"],
+                response_format=config["response_format"],
+                speed=config["speed"],
+                input=text
+            ) as response:
+                async for chunk in response.iter_bytes():
+                    yield chunk
+        except openai.RateLimitError as e:
+            tts_limiter.throttle(retry_after_seconds(e.response.headers))
+            raise
+    record_stage("tts", time.monotonic() - started)
+
+async def synthesize_tts(text, bot_id="default", priority=PRIORITY_FIRST_AUDIO):
+    """Call the TTS API, sharing one upstream call between identical requests"""
+    cache_key = get_cache_key(text, bot_id)
+    return await tts_flights.do(
+        cache_key, _synthesize_and_cache, text, cache_key, bot_id, priority
+    )
+
+@timed_stage("tts")
+async def generate_single_tts_chunk(chunk, chunk_index, check_redis=True, bot_id="default",
+                                    stream_slots=None, check_local=True):
     """Generate TTS for a single chunk"""
-    cache_key = get_cache_key(chunk)
+    cache_key = get_cache_key(chunk, bot_id)
     
-    # Check cache first
-    cached_audio = await get_redis_cache(cache_key)
-    if cached_audio:
-        return chunk_index, base64.b64decode(cached_audio), chunk
+    # Check local caches first, then the shared Redis tier
+    if check_local:
+        local_cached = await get_cached_tts(chunk, bot_id)
+        if local_cached:
+            return chunk_index, local_cached, chunk
     
-    local_cached = get_cached_tts(chunk)
-    if local_cached:
-        return chunk_index, local_cached, chunk
+    if check_redis:
+        cached_audio = await get_redis_cache(cache_key)
+        if cached_audio:
+            cache_tts(chunk, cached_audio, bot_id)
+            return chunk_index, cached_audio, chunk
     
+    # The first chunk decides when playback starts, so it goes to the front
+    priority = PRIORITY_FIRST_AUDIO if chunk_index == 0 else PRIORITY_STREAM_CHUNK
     try:
-        response = client.audio.speech.create(
-            model="tts-1-hd",
-            voice="nova",
-            input=chunk
-        )
-        audio_content = response.content
-        
-        # Cache the chunk
-        cache_tts(chunk, audio_content)
-        await set_redis_cache(cache_key, base64.b64encode(audio_content).decode())
-        
+        if stream_slots:
+            async with stream_slots:
+                audio_content = await synthesize_tts(chunk, bot_id, priority)
+        else:
+            audio_content = await synthesize_tts(chunk, bot_id, priority)
         return chunk_index, audio_content, chunk
     except Exception as e:
-        print(f"TTS Chunk Error: {e}")
+        log.error("tts_chunk_failed", chunk_index=chunk_index, error=str(e))
         return chunk_index, None, chunk
 
-async def generate_tts_audio_streaming(text, websocket):
+async def generate_tts_audio_streaming(text, websocket, bot_id="default"):
     """Generate TTS audio in parallel chunks and stream to websocket"""
     chunks = split_text_for_streaming(text, 150)
     
-    # Generate all chunks in parallel
+    # One local lookup per chunk (so each miss is counted once), then every
+    # locally-missing chunk from Redis in one round trip
+    cached = [await get_cached_tts(chunk, bot_id) for chunk in chunks]
+    missing = [i for i, audio_content in enumerate(cached) if not audio_content]
+    if missing:
+        shared = await get_redis_cache_many([get_cache_key(chunks[i], bot_id) for i in missing])
+        for i, audio_content in zip(missing, shared):
+            if audio_content:
+                cache_tts(chunks[i], audio_content, bot_id)
+                cached[i] = audio_content
+    
+    # Synthesize the rest in parallel, at most TTS_STREAM_CONCURRENCY at a time
+    stream_slots = asyncio.Semaphore(TTS_STREAM_CONCURRENCY)
     tasks = [
-        generate_single_tts_chunk(chunk, i) 
+        None if cached[i] else asyncio.create_task(generate_single_tts_chunk(
+            chunk, i, check_redis=False, bot_id=bot_id, stream_slots=stream_slots, check_local=False
+        ))
         for i, chunk in enumerate(chunks)
     ]
     
-    # Process chunks as they complete
-    for task in asyncio.as_completed(tasks):
-        chunk_index, audio_content, chunk_text = await task
-        
-        if audio_content:
-            audio_b64 = base64.b64encode(audio_content).decode()
-            await websocket.send_json({
-                "type": "audio_chunk",
-                "data": audio_b64,
-                "chunk_index": chunk_index,
-                "total_chunks": len(chunks),
-                "text_chunk": chunk_text
-            })
-        else:
-            print(f"Failed to generate audio for chunk {chunk_index}")
+    # Reorder buffer: chunk i goes out as soon as chunks 0..i are ready, so
+    # the client can play them back-to-back without buffering out of order
+    try:
+        for i, task in enumerate(tasks):
+            if task is None:
+                chunk_index, audio_content, chunk_text = i, cached[i], chunks[i]
+            else:
+                chunk_index, audio_content, chunk_text = await task
+            
+            if audio_content:
+                await send_audio(
+                    websocket,
+                    "audio_chunk",
+                    audio_content,
+                    chunk_index=chunk_index,
+                    total_chunks=len(chunks),
+                    text_chunk=chunk_text
+                )
+            else:
+                log.warning("tts_chunk_missing", chunk_index=chunk_index)
+    finally:
+        # Don't keep synthesizing if the socket went away mid-reply
+        for task in tasks:
+            if task:
+                task.cancel()
 
 # Removed duplicate endpoint - using voice-realtime instead
 
 
 
-async def generate_tts_audio(text):
-    cache_key = get_cache_key(text)
-    
-    # Check Redis first
-    cached_audio = await get_redis_cache(cache_key)
-    if cached_audio:
-        return base64.b64decode(cached_audio)
+@timed_stage("tts")
+async def generate_tts_audio(text, bot_id="default"):
+    cache_key = get_cache_key(text, bot_id)
     
-    # Check local cache
-    local_cached = get_cached_tts(text)
+    # Check local caches first
+    local_cached = await get_cached_tts(text, bot_id)
     if local_cached:
         return local_cached
     
+    # Then the shared Redis tier
+    cached_audio = await get_redis_cache(cache_key)
+    if cached_audio:
+        cache_tts(text, cached_audio, bot_id)
+        return cached_audio
+    
     try:
-        response = client.audio.speech.create(
-            model="tts-1-hd",
-            voice="nova",
-            input=text
+        return await synthesize_tts(text, bot_id)
+    except Exception as e:
+        log.error("tts_failed", error=str(e))
+        return None
+
+async def _transcribe(audio_data, filename, params, priority):
+    # Stream straight from the caller's buffer (or spool file) instead of copying into BytesIO
+    if isinstance(audio_data, FileReader):
+        audio_file = audio_data
+    else:
+        audio_file = BufferReader(audio_data, filename)
+    async with stt_limiter.slot(priority):
+        try:
+            transcript = await client.audio.transcriptions.create(file=audio_file, **params)
+        except openai.RateLimitError as e:
+            stt_limiter.throttle(retry_after_seconds(e.response.headers))
+            raise
+    # response_format="text" comes back as a bare string; callers expect .text
+    if isinstance(transcript, str):
+        transcript = Transcription(text=transcript)
+    return transcript
+
+async def prepare_upload_for_stt(file):
+    """Check an uploaded recording against the upload limits and ready it for STT.
+
+    Returns (audio, filename, has_speech). WAV recordings are read and shrunk
+    in the worker pool, which also bounds how many are decoded at once;
+    anything else is streamed from its spool file to Whisper as-is.
+    """
+    loop = asyncio.get_running_loop()
+    size, duration = await loop.run_in_executor(preprocess_pool, inspect_upload, file.file)
+    if size == 0:
+        raise HTTPException(status_code=400, detail="Empty audio file")
+    if size > STT_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload is larger than {STT_MAX_UPLOAD_BYTES} bytes")
+    if duration is not None and duration > STT_MAX_UPLOAD_SECONDS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Recording is longer than {STT_MAX_UPLOAD_SECONDS:g} seconds"
         )
-        audio_content = response.content
+    
+    if duration is not None:
+        try:
+            audio_data, has_speech = await loop.run_in_executor(
+                preprocess_pool, prepare_wav_upload, file.file
+            )
+            return audio_data, "audio.wav", has_speech
+        except Exception as e:
+            log.warning("stt_preprocess_failed", error=str(e))
+    
+    extension = os.path.splitext(file.filename or "")[1].lower() or ".wav"
+    filename = f"audio{extension}"
+    return FileReader(file.file, filename), filename, True
+
+async def preprocess_audio_for_stt(audio_data):
+    """Trim, downmix and resample WAV input in the worker pool.
+
+    Returns (audio_data, has_speech); non-WAV input comes back unchanged.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(preprocess_pool, prepare_for_stt, audio_data)
+    except Exception as e:
+        log.warning("stt_preprocess_failed", error=str(e))
+        return audio_data, True
+
+@timed_stage("stt")
+async def transcribe_audio(audio_data, filename, priority=PRIORITY_FIRST_AUDIO, **params):
+    """Transcribe audio, sharing one upstream call between identical payloads.
+
+    `audio_data` is a bytes-like buffer or a FileReader over a spooled upload.
+    """
+    params.setdefault("model", "whisper-1")
+    if isinstance(audio_data, FileReader):
+        loop = asyncio.get_running_loop()
+        digest = await loop.run_in_executor(preprocess_pool, file_digest, audio_data)
+    else:
+        digest = hashlib.sha256(audio_data)
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    digest.update(os.path.splitext(filename)[1].encode())
+    return await stt_flights.do(
+        digest.hexdigest(), _transcribe, audio_data, filename, params, priority
+    )
+
+async def stream_reply_with_tts(message, websocket, bot_id="default", extra=None):
+    """Stream the chatbot reply into TTS one sentence at a time.
+
+    Each sentence is sent to TTS as soon as it is complete, while the rest of
+    the reply is still being generated, and audio_chunk messages go out in
+    sentence order. Returns the full reply text and the number of chunks.
+    """
+    extra = extra or {}
+    accumulator = SentenceAccumulator()
+    pending = asyncio.Queue()
+    stream_slots = asyncio.Semaphore(TTS_STREAM_CONCURRENCY)
+    reply_parts = []
+    tts_chars = 0
+    sentence_count = 0
+    
+    def start_sentence(sentence):
+        nonlocal tts_chars, sentence_count
+        clean_sentence = clean_text_for_tts(sentence) if len(sentence.strip()) >= 3 else ""
+        if not clean_sentence or tts_chars >= MAX_TTS_LENGTH:
+            return
+        tts_chars += len(clean_sentence)
+        task = asyncio.create_task(generate_single_tts_chunk(
+            clean_sentence, sentence_count, bot_id=bot_id, stream_slots=stream_slots
+        ))
+        sentence_count += 1
+        pending.put_nowait((clean_sentence, task))
+    
+    async def send_in_order():
+        chunk_index = 0
+        while True:
+            item = await pending.get()
+            if item is None:
+                return chunk_index
+            sentence, task = item
+            _, audio_content, _ = await task
+            if audio_content:
+                await send_audio(
+                    websocket,
+                    "audio_chunk",
+                    audio_content,
+                    chunk_index=chunk_index,
+                    text_chunk=sentence,
+                    **extra
+                )
+                chunk_index += 1
+            else:
+                log.warning("tts_sentence_missing", sentence=sentence)
+    
+    sender = asyncio.create_task(send_in_order())
+    try:
+        async for delta in stream_chatbot_response(message, bot_id):
+            reply_parts.append(delta)
+            for sentence in accumulator.feed(delta):
+                await websocket.send_json({
+                    "type": "bot_response_partial",
+                    "text": sentence,
+                    **extra
+                })
+                start_sentence(sentence)
         
-        # Cache in both Redis and local
-        cache_tts(text, audio_content)
-        await set_redis_cache(cache_key, base64.b64encode(audio_content).decode())
+        for sentence in accumulator.flush():
+            await websocket.send_json({
+                "type": "bot_response_partial",
+                "text": sentence,
+                **extra
+            })
+            start_sentence(sentence)
         
-        return audio_content
-    except Exception as e:
-        print(f"TTS Error: {e}")
-        return None
+        pending.put_nowait(None)
+        total_chunks = await sender
+    finally:
+        if not sender.done():
+            sender.cancel()
+        while not pending.empty():
+            item = pending.get_nowait()
+            if item:
+                item[1].cancel()
+    
+    return "".join(reply_parts), total_chunks
 
 @app.post("/stt")
 async def speech_to_text(file: UploadFile = File(...)):
+    bind_endpoint("/stt")
     try:
-        audio_data = await file.read()
-        audio_file = io.BytesIO(audio_data)
-        audio_file.name = "audio.wav"
+        audio, filename, has_speech = await prepare_upload_for_stt(file)
+        if not has_speech:
+            return {"text": ""}
         
-        transcript = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file
-        )
+        transcript = await transcribe_audio(audio, filename)
         
         return {"text": transcript.text}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"STT failed: {str(e)}")
 
+def cached_audio_response(request, cache_key, audio_content, media_type, extra_headers):
+    """Serve a cached clip with validators: 304 on If-None-Match, 206 on Range"""
+    etag = audio_etag(cache_key, len(audio_content))
+    headers = {
+        **extra_headers,
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={TTS_HTTP_MAX_AGE}",
+        "Accept-Ranges": "bytes",
+        "X-Cache": "hit"
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    size = len(audio_content)
+    if_range = request.headers.get("if-range")
+    try:
+        byte_range = None
+        if not if_range or if_range == etag:
+            byte_range = parse_byte_range(request.headers.get("range"), size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    
+    start, end = byte_range or (0, size - 1)
+    status_code = 200
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        status_code = 206
+    if isinstance(audio_content, bytes):
+        return Response(audio_content[start:end + 1], status_code=status_code,
+                        media_type=media_type, headers=headers)
+    # A disk hit is an mmap: send it 64 KiB at a time instead of copying it whole
+    headers["Content-Length"] = str(end + 1 - start)
+    return StreamingResponse(
+        iter_view(audio_content, start, end + 1),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers
+    )
+
+async def iter_view(buffer, start, stop, chunk_size=64 * 1024):
+    view = memoryview(buffer)
+    try:
+        for offset in range(start, stop, chunk_size):
+            yield bytes(view[offset:min(offset + chunk_size, stop)])
+    finally:
+        view.release()
+
+async def tts_response(request, text, bot_id="default"):
+    """Cached audio with HTTP caching headers, or a cache miss streamed as it is synthesized"""
+    optimized_text = optimize_text_for_tts(clean_text_for_tts(text))
+    response_format = get_tts_config(bot_id)["response_format"]
+    media_type = AUDIO_MEDIA_TYPES.get(response_format, "application/octet-stream")
+    headers = {"Content-Disposition": f"attachment; filename=speech.{response_format}"}
+    cache_key = get_cache_key(optimized_text, bot_id)
+    
+    started = time.monotonic()
+    audio_content = await get_cached_tts(optimized_text, bot_id)
+    if audio_content is None:
+        audio_content = await get_redis_cache(cache_key)
+        if audio_content:
+            cache_tts(optimized_text, audio_content, bot_id)
+    if audio_content is None and tts_flights.in_flight(cache_key):
+        # A voice turn is already synthesizing this text; share its result
+        audio_content = await synthesize_tts(optimized_text, bot_id)
+    if audio_content:
+        record_stage("tts", time.monotonic() - started)
+        return cached_audio_response(request, cache_key, audio_content, media_type, headers)
+    
+    # Cache miss: forward audio to the client as the TTS API produces it
+    reader = tts_streams.open(
+        cache_key,
+        lambda: stream_tts_upstream(optimized_text, bot_id),
+        lambda audio: store_tts(optimized_text, audio, bot_id, cache_key)
+    )
+    try:
+        first_chunk = await reader.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(status_code=500, detail="TTS generation failed")
+    
+    async def body():
+        yield first_chunk
+        async for chunk in reader:
+            yield chunk
+    
+    # No validator yet, and a stream cut short by an upstream error mustn't be kept
+    headers.update({"Cache-Control": "no-store", "X-Cache": "miss"})
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
+
+@app.get("/tts")
+async def text_to_speech_get(request: Request, text: str, bot_id: str = "default"):
+    bind_endpoint("/tts", get_cache_namespace(bot_id))
+    try:
+        return await tts_response(request, text, bot_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"TTS failed: {str(e)}")
+
 @app.post("/tts")
-async def text_to_speech(request: dict):
+async def text_to_speech(payload: dict, request: Request):
+    bot_id = payload.get("bot_id", "default")
+    bind_endpoint("/tts", get_cache_namespace(bot_id))
     try:
-        text = request.get("text", "")
-        clean_text = clean_text_for_tts(text)
-        optimized_text = optimize_text_for_tts(clean_text)
-        
-        audio_content = await generate_tts_audio(optimized_text)
-        if not audio_content:
-            raise HTTPException(status_code=500, detail="TTS generation failed")
-        
-        return StreamingResponse(
-            io.BytesIO(audio_content),
-            media_type="audio/mpeg",
-            headers={"Content-Disposition": "attachment; filename=speech.mp3"}
-        )
+        return await tts_response(request, payload.get("text", ""), bot_id)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"TTS failed: {str(e)}")
 
 @app.websocket("/ws/voice-realtime")
 async def voice_realtime_websocket(websocket: WebSocket):
-    """Real-time voice processing with 3-second auto-stop"""
+    """Real-time voice processing with VAD endpointing"""
     await websocket.accept()
+    bind_endpoint("/ws/voice-realtime")
+    websocket = create_sender(websocket)
+    await send_protocol_info(websocket)
     
-    audio_buffer = b""
+    # Clients opt in to sentence-by-sentence audio_chunk replies with ?stream=true
+    stream_reply = websocket.query_params.get("stream") == "true"
+    raw_pcm = websocket.query_params.get("format") == "pcm16"
+    partials_enabled = websocket.query_params.get("partials") == "true"
+    session = VoiceSession(websocket, "voice-realtime")
+    barge_in_pending = False
+    audio_buffer = AudioBuffer(MAX_UTTERANCE_BYTES)
+    endpointer = create_endpointer(websocket)
     recording_start_time = None
     is_recording = False
     session_id = int(time.time())
     auto_stop_task = None
+    partial_task = None
+    speculative = None  # (partial transcript, chatbot task) started before the user finished
     
-    async def auto_stop_recording():
-        """Auto-stop recording after 3 seconds"""
-        nonlocal is_recording, audio_buffer, session_id
+    async def partial_transcripts():
+        """Transcribe the utterance so far on a fixed cadence while recording"""
+        nonlocal speculative
+        previous_text = ""
+        chunk_id = 0
         
-        await asyncio.sleep(3.0)
-        if is_recording:
-            print(f"Auto-stopping recording after 3 seconds")
+        while is_recording:
+            await asyncio.sleep(PARTIAL_TRANSCRIPT_INTERVAL)
+            if not is_recording:
+                return
             
-            # Stop recording first
-            is_recording = False
+            with audio_buffer.view() as recording:
+                window, covers_all = build_partial_window(
+                    recording, endpointer, PARTIAL_WINDOW_SECONDS
+                )
+            if window is None:
+                continue
             
-            await websocket.send_json({
-                "type": "recording_stopped",
-                "duration": 3.0,
-                "session_id": session_id,
-                "reason": "auto_stop"
-            })
+            text = await process_audio_chunk(window, websocket, chunk_id, session_id, previous_text)
+            chunk_id += 1
+            if not text:
+                continue
             
-            # Process complete audio recording
-            if len(audio_buffer) > 0:
-                asyncio.create_task(process_complete_audio(
-                    audio_buffer, websocket, session_id
+            # Same words two windows in a row: the question is probably complete,
+            # so start the chatbot while the VAD waits out the trailing silence
+            if (covers_all and speculative is None
+                    and normalize_transcript(text) == normalize_transcript(previous_text)):
+                speculative = (text, session.spawn(
+                    get_chatbot_response(text, priority=PRIORITY_STREAM_CHUNK)
                 ))
-            
-            # Send ready signal
+            previous_text = text
+    
+    async def stop_recording(reason):
+        """Close the current utterance and hand it to STT"""
+        nonlocal is_recording, session_id, speculative
+        
+        if not is_recording:
+            return
+        
+        # Stop recording first
+        is_recording = False
+        if auto_stop_task and auto_stop_task is not asyncio.current_task():
+            auto_stop_task.cancel()
+        if partial_task:
+            partial_task.cancel()
+        
+        if endpointer.supported and endpointer.elapsed_ms:
+            duration = round(endpointer.elapsed_ms / 1000, 2)
+        else:
+            duration = round(time.time() - recording_start_time, 2)
+        log.info("recording_stopped", session_id=session_id, duration=duration, reason=reason)
+        
+        await websocket.send_json({
+            "type": "recording_stopped",
+            "duration": duration,
+            "session_id": session_id,
+            "reason": reason
+        })
+        
+        # Hand the recording off without copying; take() also resets the buffer
+        audio_data = audio_buffer.take()
+        if raw_pcm and len(audio_data) > 0:
+            # ?format=pcm16 frames carry no header; Whisper needs a real WAV
+            audio_data = pcm16_to_wav(audio_data, endpointer.sample_rate, endpointer.channels)
+        if reason == "no_speech":
             await websocket.send_json({
-                "type": "ready_for_next",
+                "type": "no_speech_detected",
                 "session_id": session_id
             })
-            
-            # Reset for next recording
-            audio_buffer = b""
-            session_id = int(time.time())
+        elif len(audio_data) > 0:
+            session.spawn(process_complete_audio(
+                audio_data, websocket, session_id, stream_reply, speculative
+            ))
+            speculative = None
+        if speculative:
+            speculative[1].cancel()
+            speculative = None
+        
+        # Send ready signal
+        await websocket.send_json({
+            "type": "ready_for_next",
+            "session_id": session_id
+        })
+        
+        # Reset for next recording
+        endpointer.reset()
+        session_id = int(time.time())
+    
+    async def auto_stop_recording(limit, reason):
+        """Hard stop in case the VAD never closes the utterance"""
+        await asyncio.sleep(limit)
+        await stop_recording(reason)
     
     try:
         while True:
             # Receive audio chunk
             data = await websocket.receive_bytes()
-            current_time = time.time()
             
-            # Start recording timer on first audio
-            if not is_recording:
-                recording_start_time = current_time
+            # Start recording on first audio
+            starting = not is_recording
+            if starting:
+                recording_start_time = time.time()
                 is_recording = True
+                session.new_turn()
+                # The previous reply may still be playing; only cut it off once
+                # this turns out to be real speech rather than trailing noise
+                barge_in_pending = session.has_pending()
                 
-                print(f"Starting recording for session {session_id}")
-                
-                # Start auto-stop timer
-                auto_stop_task = asyncio.create_task(auto_stop_recording())
+                log.info("recording_started", session_id=session_id)
                 
                 await websocket.send_json({
                     "type": "recording_started",
                     "session_id": session_id
                 })
             
-            # Only add to buffer if still recording
-            if is_recording:
-                audio_buffer += data
-                
-                # Skip real-time chunk processing to avoid format issues
-                # Just accumulate audio for final processing
-                
-                # Check if we hit 3 seconds (backup check)
-                recording_duration = current_time - recording_start_time
-                if recording_duration >= 3.0:
-                    is_recording = False
-                    if auto_stop_task:
-                        auto_stop_task.cancel()
-                    
-                    # Reset for next recording
-                    audio_buffer = b""
-                    session_id = int(time.time())
+            already_truncated = audio_buffer.truncated
+            if not audio_buffer.append(data) and not already_truncated:
+                log.warning("recording_truncated", session_id=session_id, max_bytes=MAX_UTTERANCE_BYTES)
+                await websocket.send_json({
+                    "type": "recording_truncated",
+                    "max_bytes": MAX_UTTERANCE_BYTES,
+                    "session_id": session_id
+                })
+            
+            # Close the utterance as soon as the speaker goes quiet
+            decision = endpointer.feed(data)
+            
+            if starting:
+                # Audio we can't decode (e.g. WebM/Opus) keeps the fixed-length recording
+                if endpointer.supported:
+                    limit, reason = VAD_MAX_DURATION_MS / 1000, "max_duration"
+                else:
+                    limit, reason = FALLBACK_RECORDING_SECONDS, "auto_stop"
+                auto_stop_task = session.spawn(auto_stop_recording(limit, reason))
+                if partials_enabled:
+                    partial_task = session.spawn(partial_transcripts())
+            
+            if barge_in_pending:
+                if endpointer.supported:
+                    speaking = endpointer.speech_ms > 0
+                else:
+                    speaking = time.time() - recording_start_time >= BARGE_IN_MIN_SECONDS
+                if speaking:
+                    barge_in_pending = False
+                    cancelled = session.supersede()
+                    if cancelled:
+                        log.info("barge_in", session_id=session_id, cancelled_tasks=cancelled)
+                        await websocket.send_json({
+                            "type": "turn_cancelled",
+                            "reason": "barge_in",
+                            "session_id": session_id
+                        })
+            
+            if decision:
+                await stop_recording(decision)
             
     except Exception as e:
-        print(f"Real-time WebSocket error: {e}")
-        if auto_stop_task:
-            auto_stop_task.cancel()
+        log.info("websocket_closed", endpoint="/ws/voice-realtime", reason=str(e))
         await websocket.close()
+    finally:
+        # Nobody is listening any more: stop STT, chatbot and TTS work for this socket
+        await session.close()
+        await websocket.aclose()
 
 async def process_realtime_audio(audio_data, websocket, session_id):
     """Process audio in real-time with immediate response"""
     try:
         # STT processing
-        audio_file = io.BytesIO(audio_data)
-        audio_file.name = f"realtime_{session_id}.wav"
-        
-        transcript = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file,
+        transcript = await transcribe_audio(
+            audio_data,
+            f"realtime_{session_id}.wav",
             response_format="text",
             language="en"
         )
@@ -529,12 +1420,7 @@ async def process_realtime_audio(audio_data, websocket, session_id):
                 audio_content = await generate_tts_audio(optimized_text)
                 
                 if audio_content:
-                    audio_b64 = base64.b64encode(audio_content).decode()
-                    await websocket.send_json({
-                        "type": "audio_response",
-                        "data": audio_b64,
-                        "session_id": session_id
-                    })
+                    await send_audio(websocket, "audio_response", audio_content, session_id=session_id)
             
             # Run response and TTS generation
             bot_response = await get_response()
@@ -553,7 +1439,7 @@ async def process_realtime_audio(audio_data, websocket, session_id):
         })
             
     except Exception as e:
-        print(f"Realtime audio processing error: {e}")
+        log.error("realtime_audio_failed", session_id=session_id, error=str(e))
         await websocket.send_json({
             "type": "processing_error",
             "error": str(e),
@@ -566,8 +1452,10 @@ async def process_realtime_audio(audio_data, websocket, session_id):
             "session_id": session_id
         })
 
-async def process_complete_audio(audio_data, websocket, session_id):
-    """Process complete 3-second audio recording"""
+async def process_complete_audio(audio_data, websocket, session_id, stream_reply=False,
+                                 speculative=None):
+    """Process a complete recorded utterance"""
+    turn = start_turn()
     try:
         # Send processing status
         await websocket.send_json({
@@ -576,19 +1464,23 @@ async def process_complete_audio(audio_data, websocket, session_id):
         })
         
         # STT processing
-        audio_file = io.BytesIO(audio_data)
         # Detect format and use appropriate extension
         if len(audio_data) > 4 and audio_data[:4] == b'RIFF':
-            audio_file.name = f"session_{session_id}.wav"
+            filename = f"session_{session_id}.wav"
         else:
-            audio_file.name = f"session_{session_id}.webm"
+            filename = f"session_{session_id}.webm"
         
-        transcript = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file,
-            response_format="text",
-            language="en"
-        )
+        # Silent WAV recordings never reach Whisper
+        audio_data, has_speech = await preprocess_audio_for_stt(audio_data)
+        if has_speech:
+            transcript = await transcribe_audio(
+                audio_data,
+                filename,
+                response_format="text",
+                language="en"
+            )
+        else:
+            transcript = ""
         
         # Handle transcript response safely
         try:
@@ -599,7 +1491,7 @@ async def process_complete_audio(audio_data, websocket, session_id):
             else:
                 user_text = str(transcript).strip()
         except Exception as e:
-            print(f"Transcript parsing error: {e}")
+            log.warning("transcript_parse_failed", error=str(e))
             user_text = ""
         
         if user_text:
@@ -610,30 +1502,48 @@ async def process_complete_audio(audio_data, websocket, session_id):
                 "session_id": session_id
             })
             
-            # Get chatbot response
-            bot_response = await get_chatbot_response(user_text)
-            
-            # Send bot response
-            await websocket.send_json({
-                "type": "bot_response",
-                "text": bot_response,
-                "session_id": session_id
-            })
-            
-            # Generate TTS
-            clean_text = clean_text_for_tts(bot_response)
-            optimized_text = optimize_text_for_tts(clean_text)
-            
-            audio_content = await generate_tts_audio(optimized_text)
-            
-            if audio_content:
-                audio_b64 = base64.b64encode(audio_content).decode()
+            if stream_reply:
+                if speculative:
+                    speculative[1].cancel()
+                
+                # Speak each sentence as soon as the chatbot produces it
+                bot_response, total_chunks = await stream_reply_with_tts(
+                    user_text, websocket, extra={"session_id": session_id}
+                )
+                await websocket.send_json({
+                    "type": "bot_response",
+                    "text": bot_response,
+                    "session_id": session_id
+                })
                 await websocket.send_json({
-                    "type": "audio_response",
-                    "data": audio_b64,
+                    "type": "audio_complete",
+                    "total_chunks": total_chunks,
                     "session_id": session_id
                 })
+            else:
+                # Get chatbot response, possibly already started from a partial
+                bot_response = await claim_speculative_response(speculative, user_text)
+                if bot_response is None:
+                    bot_response = await get_chatbot_response(user_text)
+                
+                # Send bot response
+                await websocket.send_json({
+                    "type": "bot_response",
+                    "text": bot_response,
+                    "session_id": session_id
+                })
+                
+                # Generate TTS
+                clean_text = clean_text_for_tts(bot_response)
+                optimized_text = optimize_text_for_tts(clean_text)
+                
+                audio_content = await generate_tts_audio(optimized_text)
+                
+                if audio_content:
+                    await send_audio(websocket, "audio_response", audio_content, session_id=session_id)
         else:
+            if speculative:
+                speculative[1].cancel()
             await websocket.send_json({
                 "type": "no_speech_detected",
                 "session_id": session_id
@@ -644,35 +1554,39 @@ async def process_complete_audio(audio_data, websocket, session_id):
             "type": "processing_complete",
             "session_id": session_id
         })
+        turn.finish()
             
     except Exception as e:
-        print(f"Audio processing error: {e}")
+        log.error("audio_processing_failed", session_id=session_id, error=str(e))
         await websocket.send_json({
             "type": "processing_error",
             "error": str(e),
             "session_id": session_id
         })
 
-async def process_audio_chunk(audio_data, websocket, chunk_id):
-    """Process individual audio chunk in real-time"""
+async def process_audio_chunk(audio_data, websocket, chunk_id, session_id=None, previous_text=""):
+    """Transcribe a window of the in-progress utterance and send a partial transcript"""
     try:
         # Skip if audio data is too small
         if len(audio_data) < 1000:
-            return
+            return None
             
         # Quick STT processing
-        audio_file = io.BytesIO(audio_data)
-        # Try different extensions based on the audio data
-        if len(audio_data) > 0:
-            # Check if it looks like WAV (starts with RIFF)
-            if audio_data[:4] == b'RIFF':
-                audio_file.name = f"chunk_{chunk_id}.wav"
-            else:
-                audio_file.name = f"chunk_{chunk_id}.webm"
+        # Check if it looks like WAV (starts with RIFF)
+        if audio_data[:4] == b'RIFF':
+            filename = f"chunk_{chunk_id}.wav"
+        else:
+            filename = f"chunk_{chunk_id}.webm"
+        
+        audio_data, has_speech = await preprocess_audio_for_stt(audio_data)
+        if not has_speech:
+            return None
         
-        transcript = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file,
+        # Partial transcripts wait behind final utterances
+        transcript = await transcribe_audio(
+            audio_data,
+            filename,
+            priority=PRIORITY_STREAM_CHUNK,
             response_format="text",
             language="en"
         )
@@ -684,21 +1598,38 @@ async def process_audio_chunk(audio_data, websocket, chunk_id):
             chunk_text = getattr(transcript, 'text', '').strip()
         
         if chunk_text:
-            # Send partial transcript immediately
+            # Send partial transcript immediately, with the words that held
+            # steady since the previous window
             await websocket.send_json({
                 "type": "partial_transcript",
                 "text": chunk_text,
-                "chunk_id": chunk_id
+                "stable_text": stable_prefix(previous_text, chunk_text),
+                "chunk_id": chunk_id,
+                "session_id": session_id
             })
-            
-            # Process with chatbot immediately (don't wait)
-            asyncio.create_task(process_chunk_response(chunk_text, websocket, chunk_id))
+        
+        return chunk_text
             
     except Exception as e:
-        print(f"Chunk processing error: {e}")
+        log.error("chunk_processing_failed", chunk_id=chunk_id, error=str(e))
         # Don't fail completely, just skip this chunk
+        return None
 
-async def process_chunk_response(text, websocket, chunk_id):
+async def claim_speculative_response(speculative, user_text):
+    """Reuse a chatbot reply started from a partial transcript if it still matches"""
+    if not speculative:
+        return None
+    partial_text, task = speculative
+    if normalize_transcript(partial_text) != normalize_transcript(user_text):
+        task.cancel()
+        return None
+    try:
+        return await task
+    except Exception as e:
+        log.warning("speculative_chatbot_failed", error=str(e))
+        return None
+
+async def process_chunk_response(text, websocket, chunk_id, session=None):
     """Process chatbot response for chunk"""
     try:
         # Get bot response
@@ -711,11 +1642,15 @@ async def process_chunk_response(text, websocket, chunk_id):
             "chunk_id": chunk_id
         })
         
-        # Generate TTS in background
-        asyncio.create_task(generate_chunk_tts(bot_response, websocket, chunk_id))
+        # Generate TTS in background, owned by the connection when there is one
+        tts = generate_chunk_tts(bot_response, websocket, chunk_id)
+        if session:
+            session.spawn(tts)
+        else:
+            asyncio.create_task(tts)
         
     except Exception as e:
-        print(f"Chunk response error: {e}")
+        log.error("chunk_response_failed", chunk_id=chunk_id, error=str(e))
 
 async def generate_chunk_tts(text, websocket, chunk_id):
     """Generate TTS for chunk response"""
@@ -726,31 +1661,36 @@ async def generate_chunk_tts(text, websocket, chunk_id):
         audio_content = await generate_tts_audio(optimized_text)
         
         if audio_content:
-            audio_b64 = base64.b64encode(audio_content).decode()
-            await websocket.send_json({
-                "type": "chunk_audio",
-                "data": audio_b64,
-                "chunk_id": chunk_id
-            })
+            await send_audio(websocket, "chunk_audio", audio_content, chunk_id=chunk_id)
             
     except Exception as e:
-        print(f"Chunk TTS error: {e}")
+        log.error("chunk_tts_failed", chunk_id=chunk_id, error=str(e))
 
 @app.websocket("/ws/voice-stream")
 async def voice_stream_websocket(websocket: WebSocket):
     await websocket.accept()
+    bind_endpoint("/ws/voice-stream")
+    websocket = create_sender(websocket)
+    await send_protocol_info(websocket)
+    
+    # ?stream=true pipes the chatbot reply into TTS sentence by sentence
+    stream_reply = websocket.query_params.get("stream") == "true"
+    session = VoiceSession(websocket, "voice-stream")
     
     try:
         while True:
             data = await websocket.receive_bytes()
+            start_turn()
             
-            audio_file = io.BytesIO(data)
-            audio_file.name = "stream.wav"
+            # A new utterance supersedes whatever is still answering the last one
+            session.new_turn()
+            if session.supersede():
+                await websocket.send_json({"type": "turn_cancelled", "reason": "barge_in"})
             
             # Faster STT with language hint
-            transcript = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
+            transcript = await transcribe_audio(
+                data,
+                "stream.wav",
                 response_format="text",
                 language="en"
             )
@@ -776,34 +1716,57 @@ async def voice_stream_websocket(websocket: WebSocket):
                 optimized_response = optimize_text_for_tts(clean_response)
                 await generate_tts_audio_streaming(optimized_response, websocket)
                 await websocket.send_json({"type": "audio_complete"})
+                current_turn().finish()
+            
+            async def process_streaming_reply():
+                bot_response, total_chunks = await stream_reply_with_tts(user_text, websocket)
+                await websocket.send_json({
+                    "type": "bot_response",
+                    "text": bot_response
+                })
+                await websocket.send_json({
+                    "type": "audio_complete",
+                    "total_chunks": total_chunks
+                })
+                current_turn().finish()
+            
+            if stream_reply:
+                session.spawn(process_streaming_reply())
+                continue
             
             # Start chat response immediately
-            response_task = asyncio.create_task(get_and_send_response())
+            response_task = session.spawn(get_and_send_response())
             
             # When response is ready, start TTS in parallel
             bot_response = await response_task
-            asyncio.create_task(process_tts(bot_response))
+            session.spawn(process_tts(bot_response))
             
     except Exception as e:
-        print(f"WebSocket error: {e}")
+        log.info("websocket_closed", endpoint="/ws/voice-stream", reason=str(e))
         await websocket.close()
+    finally:
+        await session.close()
+        await websocket.aclose()
 
 @app.websocket("/ws/voice-stream-legacy")
 async def voice_stream_legacy(websocket: WebSocket):
     """Legacy endpoint with full audio response"""
     await websocket.accept()
+    bind_endpoint("/ws/voice-stream-legacy")
+    websocket = create_sender(websocket)
+    await send_protocol_info(websocket)
+    session = VoiceSession(websocket, "voice-stream-legacy")
     
     try:
         while True:
             data = await websocket.receive_bytes()
+            start_turn()
             
-            audio_file = io.BytesIO(data)
-            audio_file.name = "stream.wav"
+            session.new_turn()
+            if session.supersede():
+                await websocket.send_json({"type": "turn_cancelled", "reason": "barge_in"})
             
-            transcript = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file
-            )
+            transcript = await transcribe_audio(data, "stream.wav")
             
             user_text = transcript.text
             
@@ -825,27 +1788,32 @@ async def voice_stream_legacy(websocket: WebSocket):
                 
                 audio_content = await generate_tts_audio(optimized_response)
                 if audio_content:
-                    audio_b64 = base64.b64encode(audio_content).decode()
-                    await websocket.send_json({
-                        "type": "audio",
-                        "data": audio_b64
-                    })
+                    await send_audio(websocket, "audio", audio_content)
+                    current_turn().finish()
                 else:
                     await websocket.send_json({
                         "type": "error",
                         "message": "TTS failed, but text response available"
                     })
             
-            asyncio.create_task(process_response())
+            session.spawn(process_response())
             
     except Exception as e:
-        print(f"WebSocket error: {e}")
+        log.info("websocket_closed", endpoint="/ws/voice-stream-legacy", reason=str(e))
         await websocket.close()
+    finally:
+        await session.close()
+        await websocket.aclose()
 
 @app.websocket("/ws/{bot_id}")
 async def websocket_bot_endpoint_old(websocket: WebSocket, bot_id: str = "default"):
     await websocket.accept()
-    print(f"WebSocket connected for bot_id: {bot_id}")
+    bind_endpoint("/ws/{bot_id}", get_cache_namespace(bot_id))
+    websocket = create_sender(websocket)
+    await send_protocol_info(websocket)
+    log.info("websocket_connected", endpoint="/ws/{bot_id}", bot_id=bot_id)
+    
+    stream_reply = websocket.query_params.get("stream") == "true"
     
     try:
         while True:
@@ -853,6 +1821,25 @@ async def websocket_bot_endpoint_old(websocket: WebSocket, bot_id: str = "defaul
             
             if data.get("type") == "message":
                 message = data.get("message", "")
+                turn = start_turn()
+                
+                if stream_reply or data.get("stream"):
+                    # Start speaking on the first complete sentence
+                    response_text, total_chunks = await stream_reply_with_tts(
+                        message, websocket, bot_id, extra={"bot_id": bot_id}
+                    )
+                    await websocket.send_json({
+                        "type": "text_response",
+                        "text": response_text,
+                        "bot_id": bot_id
+                    })
+                    await websocket.send_json({
+                        "type": "audio_complete",
+                        "total_chunks": total_chunks,
+                        "bot_id": bot_id
+                    })
+                    turn.finish()
+                    continue
                 
                 # Get chatbot response
                 response_text = await get_chatbot_response(message, bot_id)
@@ -867,102 +1854,157 @@ async def websocket_bot_endpoint_old(websocket: WebSocket, bot_id: str = "defaul
                 # Generate TTS audio
                 cleaned_text = clean_text_for_tts(response_text)
                 optimized_text = optimize_text_for_tts(cleaned_text)
-                audio_content = await generate_tts_audio(optimized_text)
+                audio_content = await generate_tts_audio(optimized_text, bot_id)
                 
                 if audio_content:
-                    audio_b64 = base64.b64encode(audio_content).decode()
-                    await websocket.send_json({
-                        "type": "audio_response",
-                        "data": audio_b64,
-                        "bot_id": bot_id
-                    })
+                    await send_audio(websocket, "audio_response", audio_content, bot_id=bot_id)
+                    turn.finish()
                 
     except Exception as e:
-        print(f"WebSocket error for bot_id {bot_id}: {e}")
+        log.info("websocket_closed", endpoint="/ws/{bot_id}", bot_id=bot_id, reason=str(e))
     finally:
-        print(f"WebSocket disconnected for bot_id: {bot_id}")
+        await websocket.aclose()
+        log.info("websocket_disconnected", endpoint="/ws/{bot_id}", bot_id=bot_id)
 
 @app.post("/voice-chat")
 async def voice_chat(file: UploadFile = File(...), bot_id: str = "default"):
+    bind_endpoint("/voice-chat", get_cache_namespace(bot_id))
+    turn = start_turn()
     try:
-        print(f"Processing voice chat for bot_id: {bot_id}")
-        
-        # Read and validate audio
-        audio_data = await file.read()
-        if len(audio_data) == 0:
-            raise HTTPException(status_code=400, detail="Empty audio file")
+        log.info("voice_chat_request", bot_id=bot_id)
         
-        print(f"Audio file size: {len(audio_data)} bytes")
+        # Validate the spooled upload without reading it into memory
+        audio, filename, has_speech = await prepare_upload_for_stt(file)
+        log.debug("voice_chat_audio", bot_id=bot_id, bytes=file.size)
         
         # STT Processing
-        audio_file = io.BytesIO(audio_data)
-        audio_file.name = "audio.wav"
-        
-        transcript = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file
-        )
+        if has_speech:
+            transcript = await transcribe_audio(audio, filename)
+            user_text = transcript.text.strip()
+        else:
+            user_text = ""
         
-        user_text = transcript.text.strip()
         if not user_text:
             user_text = "Hello"
         
-        print(f"User: {user_text}")
+        log.info("voice_chat_transcript", bot_id=bot_id, transcript=user_text)
         
         # Get chatbot response
         bot_response = await get_chatbot_response(user_text)
-        print(f"Bot original: {bot_response}")
+        log.debug("voice_chat_answer", bot_id=bot_id, bot_response=bot_response)
         
         # Clean and optimize response
         clean_response = clean_text_for_tts(bot_response)
         optimized_response = optimize_text_for_tts(clean_response)
-        print(f"Bot optimized: {optimized_response}")
+        log.info("voice_chat_reply", bot_id=bot_id, response=optimized_response)
         
         # Generate TTS
-        audio_content = await generate_tts_audio(optimized_response)
+        audio_content = await generate_tts_audio(optimized_response, bot_id)
         
         if audio_content:
+            turn.audio_ready()
+            turn.finish()
+            response_format = get_tts_config(bot_id)["response_format"]
             return StreamingResponse(
                 io.BytesIO(audio_content),
-                media_type="audio/mpeg",
+                media_type=AUDIO_MEDIA_TYPES.get(response_format, "application/octet-stream"),
                 headers={
                     "X-Transcript": user_text,
-                    "X-Bot-Response": optimized_response
+                    "X-Bot-Response": optimized_response,
+                    "X-Trace-Id": turn.trace_id
                 }
             )
         else:
             return {
                 "transcript": user_text,
                 "response": optimized_response,
-                "audio_error": "TTS generation failed"
+                "audio_error": "TTS generation failed",
+                "trace_id": turn.trace_id
             }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Voice chat error: {type(e).__name__}: {str(e)}")
+        log.error("voice_chat_failed", bot_id=bot_id, error_type=type(e).__name__, error=str(e))
         return {
             "transcript": "",
             "response": "I had trouble processing your request. Please try again.",
-            "error": str(e)
+            "error": str(e),
+            "trace_id": turn.trace_id
         }
 
 
 
 
 
+def _cache_stats():
+    caches = {"tts_memory": tts_cache.stats(), "chat_answer": answer_cache.stats()}
+    if tts_disk_store:
+        caches["tts_disk"] = tts_disk_store.stats()
+    if redis_cache:
+        caches["tts_redis"] = redis_cache.stats()
+    return caches
+
+metrics_registry.counter(
+    "voice_cache_lookups_total", "Cache lookups by result", ("cache", "result"),
+    lambda: [
+        ((name, result), stats[key])
+        for name, stats in _cache_stats().items()
+        for result, key in (("hit", "hits"), ("miss", "misses"))
+    ]
+)
+metrics_registry.gauge(
+    "voice_cache_hit_ratio", "Hits / lookups since start", ("cache",),
+    lambda: [
+        ((name,), round(stats["hits"] / (stats["hits"] + stats["misses"]), 4))
+        for name, stats in _cache_stats().items()
+        if stats["hits"] + stats["misses"]
+    ]
+)
+metrics_registry.gauge(
+    "voice_upstream_in_flight", "Upstream calls currently running", ("resource",),
+    lambda: [((limiter.name,), limiter.slots.in_use) for limiter in (stt_limiter, tts_limiter, chat_limiter)]
+)
+metrics_registry.gauge(
+    "voice_upstream_queued", "Upstream calls waiting for admission", ("resource",),
+    lambda: [((limiter.name,), limiter.slots.waiting) for limiter in (stt_limiter, tts_limiter, chat_limiter)]
+)
+metrics_registry.gauge(
+    "voice_open_websockets", "Open voice WebSocket connections", (),
+    lambda: [((), sender_stats["open_sockets"])]
+)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
-    redis_status = "disabled"
-    # try:
-    #     await redis_client.ping()
-    # except:
-    #     redis_status = "disconnected"
+    redis_status = await redis_cache.ping() if redis_cache else "disabled"
     
     return {
         "message": "Voice Backend Service is running", 
         "status": "active",
         "redis_status": redis_status,
         "optimizations": {
-            "tts_cache": f"{len(tts_cache)} items cached",
+            "tts_cache": tts_cache.stats(),
+            "chat_answer_cache": answer_cache.stats(),
+            "tts_disk_cache": tts_disk_store.stats() if tts_disk_store else "disabled",
+            "redis_cache": redis_cache.stats() if redis_cache else "disabled",
+            "tts_single_flight": tts_flights.stats(),
+            "tts_streams": tts_streams.stats(),
+            "stt_single_flight": stt_flights.stats(),
+            "chatbot_backends": chatbot_backends.stats(),
+            "chatbot_pools": chatbot_pools.stats(),
+            "upstream_admission": {
+                "stt": stt_limiter.stats(),
+                "tts": tts_limiter.stats(),
+                "chat": chat_limiter.stats()
+            },
+            "voice_sessions": dict(session_stats),
+            "ws_send_queue": dict(sender_stats),
+            "logging": logging_stats(),
             "max_tts_length": MAX_TTS_LENGTH,
             "cache_ttl": "15 days"
         },
@@ -973,13 +2015,27 @@ async def root():
             "voice_chat": "/voice-chat",
             "stt": "/stt",
             "tts": "/tts",
-            "relay": "/relay-message"
+            "relay": "/relay-message",
+            "chat_cache_invalidate": "DELETE /chat-cache/{bot_id}",
+            "metrics": "/metrics"
         }
     }
 
+@app.on_event("startup")
+async def startup_event():
+    if CHATBOT_POOL_WARMUP:
+        urls = list(CHATBOT_URLS.values()) + list(CHATBOT_HEDGE_URLS.values())
+        await chatbot_pools.warm_up(urls, CHATBOT_POOL_WARMUP)
+
 @app.on_event("shutdown")
 async def shutdown_event():
-    await connection_pool.aclose()
+    await chatbot_pools.aclose()
+    await client.close()
+    preprocess_pool.shutdown(wait=False)
+    tts_disk_pool.shutdown(wait=True)
+    if redis_cache:
+        await redis_cache.close()
+    shutdown_logging()
 
 if __name__ == "__main__":
     import uvicorn
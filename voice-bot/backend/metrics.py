@@ -0,0 +1,188 @@
+import asyncio
+import bisect
+import contextvars
+import functools
+import time
+import uuid
+from contextlib import contextmanager
+
+from voice_logging import log
+
+# Seconds; spans a cached TTS hit (~ms) up to a slow chatbot backend
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        bucket_names = self.labelnames + ("le",)
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_names, key + (bound,))} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CollectedMetric:
+    """Gauge or counter whose samples are read from live objects at scrape time"""
+
+    def __init__(self, name, help_text, metric_type, labelnames, collect):
+        self.name = name
+        self.help_text = help_text
+        self.metric_type = metric_type
+        self.labelnames = tuple(labelnames)
+        self.collect = collect  # -> iterable of (label values tuple, value)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        for key, value in self.collect():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def histogram(self, name, help_text, labelnames, buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help_text, labelnames, collect):
+        self._metrics.append(CollectedMetric(name, help_text, "gauge", labelnames, collect))
+
+    def counter(self, name, help_text, labelnames, collect):
+        self._metrics.append(CollectedMetric(name, help_text, "counter", labelnames, collect))
+
+    def render(self):
+        """Prometheus text exposition format 0.0.4"""
+        lines = []
+        for metric in self._metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                log.error("metrics_collection_error", metric=metric.name, error=str(e))
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+stage_seconds = registry.histogram(
+    "voice_stage_duration_seconds",
+    "Time spent in one pipeline stage (stt, chatbot, tts) as seen by the caller",
+    ("stage", "endpoint", "bot_id")
+)
+first_audio_seconds = registry.histogram(
+    "voice_time_to_first_audio_seconds",
+    "From the start of a turn until its first audio is ready to send",
+    ("endpoint", "bot_id")
+)
+turn_seconds = registry.histogram(
+    "voice_turn_duration_seconds",
+    "End-to-end time of a completed turn",
+    ("endpoint", "bot_id")
+)
+
+
+# Which endpoint / bot the current task works for, and the turn it belongs to.
+# Tasks copy the context when they are created, so work spawned for a turn is
+# attributed to it without passing labels through every call.
+_endpoint = contextvars.ContextVar("metrics_endpoint", default=("other", "default"))
+_turn = contextvars.ContextVar("metrics_turn", default=None)
+
+
+def bind_endpoint(endpoint, bot_id="default"):
+    _endpoint.set((endpoint, bot_id))
+
+
+class Turn:
+    """One user utterance -> reply, identified by a trace_id sent to the client"""
+
+    def __init__(self, endpoint, bot_id):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.endpoint = endpoint
+        self.bot_id = bot_id
+        self.started = time.monotonic()
+        self.first_audio = None
+        self.finished = False
+
+    def audio_ready(self):
+        if self.first_audio is None:
+            self.first_audio = time.monotonic() - self.started
+            first_audio_seconds.observe(self.first_audio, endpoint=self.endpoint, bot_id=self.bot_id)
+
+    def finish(self):
+        if not self.finished:
+            self.finished = True
+            turn_seconds.observe(time.monotonic() - self.started,
+                                 endpoint=self.endpoint, bot_id=self.bot_id)
+
+
+def start_turn():
+    endpoint, bot_id = _endpoint.get()
+    turn = Turn(endpoint, bot_id)
+    _turn.set(turn)
+    return turn
+
+
+def current_turn():
+    return _turn.get()
+
+
+def record_stage(stage, seconds):
+    turn = _turn.get()
+    endpoint, bot_id = (turn.endpoint, turn.bot_id) if turn else _endpoint.get()
+    stage_seconds.observe(seconds, stage=stage, endpoint=endpoint, bot_id=bot_id)
+
+
+@contextmanager
+def observe_stage(stage):
+    """Time a stage; cancelled work (barge-in, disconnect) is not recorded"""
+    start = time.monotonic()
+    try:
+        yield
+    except asyncio.CancelledError:
+        raise
+    except BaseException:
+        record_stage(stage, time.monotonic() - start)
+        raise
+    record_stage(stage, time.monotonic() - start)
+
+
+def timed_stage(stage):
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with observe_stage(stage):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,48 @@
+import re
+
+from audio_preprocess import encode_wav, resample
+from vad import np, pcm16_to_mono
+
+
+def normalize_transcript(text):
+    """Lower-case, punctuation-free form used to compare transcripts"""
+    return " ".join(re.sub(r"[^\w\s']", " ", text.lower()).split())
+
+
+def stable_prefix(previous, current):
+    """Words two consecutive partial transcripts agree on, from the start"""
+    stable = []
+    for old_word, new_word in zip(previous.split(), current.split()):
+        if normalize_transcript(old_word) != normalize_transcript(new_word):
+            break
+        stable.append(new_word)
+    return " ".join(stable)
+
+
+def build_partial_window(recording, endpointer, window_seconds):
+    """Audio to transcribe for a partial result, plus whether it covers the whole utterance.
+
+    With decodable PCM the last `window_seconds` are re-framed as a standalone
+    16 kHz mono WAV. Other containers (WebM/Opus) can only be decoded from the
+    start, so the whole recording so far is sent. Returns (None, False) when
+    there is nothing usable yet.
+    """
+    if len(recording) == 0:
+        return None, False
+
+    if endpointer.sample_rate is None or np is None:
+        if endpointer.supported:
+            return None, False  # header not seen yet
+        return bytes(recording), True
+
+    frame_bytes = 2 * endpointer.channels
+    pcm = recording[endpointer.data_offset:]
+    max_bytes = int(window_seconds * endpointer.sample_rate) * frame_bytes
+    covers_all = len(pcm) <= max_bytes
+    pcm = pcm[max(0, len(pcm) - max_bytes):]
+    pcm = pcm[:len(pcm) - len(pcm) % frame_bytes]
+    if len(pcm) == 0:
+        return None, False
+
+    samples = resample(pcm16_to_mono(pcm, endpointer.channels), endpointer.sample_rate)
+    return encode_wav(samples), covers_all
@@ -0,0 +1,212 @@
+import time
+import zlib
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # redis is optional; the tier just stays disabled
+    redis = None
+
+from voice_logging import log
+
+# One-byte header in front of every stored value
+FORMAT_RAW = b"\x00"
+FORMAT_ZLIB = b"\x01"
+
+
+def is_compressed_audio(audio_content):
+    """True for codecs zlib can't shrink: MP3, AAC (ADTS or MP4), Opus/Ogg, FLAC"""
+    head = bytes(audio_content[:12])
+    return (
+        head.startswith((b"ID3", b"OggS", b"fLaC"))
+        or head[4:8] == b"ftyp"
+        or (len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0)  # MPEG/ADTS frame sync
+    )
+
+
+class InMemoryRedis:
+    """Minimal stand-in for redis.asyncio.Redis, for local runs and benchmarks.
+
+    Implements just the commands RedisAudioCache uses, with the same bytes-in,
+    bytes-out semantics as a client created with decode_responses=False.
+    """
+
+    def __init__(self):
+        self._data = {}
+
+    def _live(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and time.time() >= expires_at:
+            del self._data[key]
+            return None
+        return value
+
+    async def ping(self):
+        return True
+
+    async def get(self, key):
+        return self._live(key)
+
+    async def mget(self, keys):
+        return [self._live(key) for key in keys]
+
+    async def set(self, key, value, ex=None):
+        self._data[key] = (bytes(value), time.time() + ex if ex else None)
+        return True
+
+    async def delete(self, *keys):
+        return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def pipeline(self, transaction=False):
+        return _InMemoryPipeline(self)
+
+    async def aclose(self):
+        self._data.clear()
+
+
+class _InMemoryPipeline:
+    def __init__(self, store):
+        self._store = store
+        self._ops = []
+
+    def set(self, key, value, ex=None):
+        self._ops.append((key, value, ex))
+        return self
+
+    async def execute(self):
+        return [await self._store.set(key, value, ex=ex) for key, value, ex in self._ops]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._ops = []
+
+
+class RedisAudioCache:
+    """Shared L2 cache for TTS audio stored as raw bytes in Redis.
+
+    Values are stored binary (no base64) behind a one-byte format header, and
+    can optionally be zlib-compressed; clips that are already in a compressed
+    codec are stored raw rather than deflated for nothing. Any Redis error disables the tier for
+    `backoff` seconds so a dead Redis costs one timeout, not one per request.
+    """
+
+    def __init__(self, client, ttl, prefix="tts:", compress=False,
+                 compress_min_bytes=1024, backoff=30.0):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.compress = compress
+        self.compress_min_bytes = compress_min_bytes
+        self.backoff = backoff
+        self._disabled_until = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.bytes_saved = 0
+
+    @classmethod
+    def from_url(cls, url, ttl, password=None, socket_timeout=0.5, **kwargs):
+        if url.startswith("memory://"):
+            return cls(InMemoryRedis(), ttl, **kwargs)
+        if redis is None:
+            log.warning("redis_cache_disabled", reason="redis package not installed")
+            return None
+        client = redis.from_url(
+            url,
+            password=password,
+            decode_responses=False,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout
+        )
+        return cls(client, ttl, **kwargs)
+
+    @property
+    def available(self):
+        return time.monotonic() >= self._disabled_until
+
+    def _fail(self, e):
+        self.errors += 1
+        self._disabled_until = time.monotonic() + self.backoff
+        log.error("redis_cache_error", backoff_seconds=self.backoff, error_type=type(e).__name__, error=str(e))
+
+    def _encode(self, audio_content):
+        if (self.compress and len(audio_content) >= self.compress_min_bytes
+                and not is_compressed_audio(audio_content)):
+            compressed = zlib.compress(audio_content, 1)
+            if len(compressed) < len(audio_content):
+                self.bytes_saved += len(audio_content) - len(compressed)
+                return FORMAT_ZLIB + compressed
+        return FORMAT_RAW + bytes(audio_content)
+
+    @staticmethod
+    def _decode(value):
+        if not value:
+            return None
+        header, body = value[:1], memoryview(value)[1:]
+        if header == FORMAT_ZLIB:
+            return zlib.decompress(body)
+        if header == FORMAT_RAW:
+            return bytes(body)
+        return None
+
+    async def get(self, key):
+        return (await self.get_many([key]))[0]
+
+    async def get_many(self, keys):
+        """Look up several keys in a single MGET round trip."""
+        if not keys or not self.available:
+            return [None] * len(keys)
+        try:
+            values = await self.client.mget([self.prefix + key for key in keys])
+        except Exception as e:
+            self._fail(e)
+            return [None] * len(keys)
+
+        results = [self._decode(value) for value in values]
+        hit_count = sum(1 for result in results if result is not None)
+        self.hits += hit_count
+        self.misses += len(results) - hit_count
+        return results
+
+    async def set(self, key, audio_content):
+        await self.set_many({key: audio_content})
+
+    async def set_many(self, items):
+        """Store several clips with one pipelined round trip."""
+        if not items or not self.available:
+            return
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for key, audio_content in items.items():
+                    pipe.set(self.prefix + key, self._encode(audio_content), ex=self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            self._fail(e)
+
+    async def ping(self):
+        try:
+            await self.client.ping()
+            return "connected" if self.available else "backoff"
+        except Exception:
+            return "disconnected"
+
+    async def close(self):
+        close = getattr(self.client, "aclose", None) or self.client.close
+        try:
+            await close()
+        except Exception:
+            pass
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "compression": self.compress,
+            "bytes_saved": self.bytes_saved,
+            "available": self.available
+        }
@@ -0,0 +1,68 @@
+import asyncio
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls into one in-flight task.
+
+    The first caller for a key starts the work as its own task; callers that
+    arrive while it is running await the same task. Waiters are shielded, so
+    one caller disconnecting doesn't cancel the work for everyone else, but
+    once the last waiter is cancelled the upstream call is cancelled too.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self._waiters = {}
+        self.leaders = 0
+        self.followers = 0
+        self.abandoned = 0
+
+    def __len__(self):
+        return len(self._inflight)
+
+    async def do(self, key, fn, *args, **kwargs):
+        while True:
+            task = self._inflight.get(key)
+            if task is None or task.cancelling():
+                # Nothing running, or the last call was abandoned and is winding down
+                self.leaders += 1
+                task = asyncio.create_task(fn(*args, **kwargs))
+                self._inflight[key] = task
+                task.add_done_callback(lambda t, k=key: self._forget(k, t))
+            else:
+                self.followers += 1
+
+            self._waiters[task] = self._waiters.get(task, 0) + 1
+            try:
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if task.cancelled() and not asyncio.current_task().cancelling():
+                    # The shared call was cancelled under us, but this caller
+                    # still wants the result: start over as a new leader
+                    continue
+                if self._waiters[task] == 1 and not task.done():
+                    # Nobody is left to use the result
+                    task.cancel()
+                    self.abandoned += 1
+                raise
+            finally:
+                self._waiters[task] -= 1
+                if not self._waiters[task]:
+                    del self._waiters[task]
+
+    def in_flight(self, key):
+        return key in self._inflight
+
+    def _forget(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved; waiters already saw it
+
+    def stats(self):
+        return {
+            "in_flight": len(self._inflight),
+            "upstream_calls": self.leaders,
+            "coalesced": self.followers,
+            "abandoned": self.abandoned
+        }
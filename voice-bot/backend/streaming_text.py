@@ -0,0 +1,184 @@
+import json
+import re
+
+# Abbreviations whose trailing period is not a sentence boundary
+ABBREVIATIONS = {
+    "dr", "mr", "mrs", "ms", "prof", "st", "ave", "blvd", "rd", "ste", "jr", "sr",
+    "vs", "etc", "e.g", "i.e", "a.m", "p.m", "approx", "dept", "inc", "co"
+}
+
+# Sentence-ending punctuation (plus closing quotes/brackets) followed by whitespace,
+# or a line break / list item start
+_BOUNDARY_RE = re.compile(r"""[.!?]+["')\]]*(?=\s)|\n+""")
+
+
+def _is_abbreviation(text, end):
+    """True if the period ending at `end` belongs to an abbreviation or initial"""
+    match = re.search(r"([A-Za-z][A-Za-z.]*)\.$", text[:end])
+    if not match:
+        return False
+    word = match.group(1).lower()
+    return word in ABBREVIATIONS or len(word) == 1
+
+
+def find_sentence_boundaries(text):
+    """Return the end offsets of complete sentences in text"""
+    boundaries = []
+    for match in _BOUNDARY_RE.finditer(text):
+        end = match.end()
+        if text[end - 1] == "." and _is_abbreviation(text, end):
+            continue
+        boundaries.append(end)
+    return boundaries
+
+
+class SentenceAccumulator:
+    """Incrementally split streamed text into complete sentences.
+
+    feed() takes arbitrary text deltas and returns the sentences completed so
+    far; flush() returns whatever is left once the stream ends. A boundary is
+    only accepted once the following character has arrived, so a delta that
+    ends in "Dr." or "3." can't split a sentence early.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, delta):
+        self._buffer += delta
+        boundaries = find_sentence_boundaries(self._buffer)
+        if not boundaries:
+            return []
+
+        sentences = []
+        start = 0
+        for end in boundaries:
+            sentence = self._buffer[start:end].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = end
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self):
+        remainder = self._buffer.strip()
+        self._buffer = ""
+        return [remainder] if remainder else []
+
+
+def extract_stream_text(data):
+    """Pull the text delta out of one SSE/NDJSON event from a chatbot backend"""
+    try:
+        event = json.loads(data)
+    except ValueError:
+        return data
+
+    if isinstance(event, str):
+        return event
+    if not isinstance(event, dict):
+        return ""
+
+    # OpenAI-style {"choices": [{"delta": {"content": ...}}]}
+    choices = event.get("choices")
+    if choices and isinstance(choices, list):
+        delta = choices[0].get("delta") or {}
+        return delta.get("content") or ""
+
+    for key in ("delta", "content", "token", "text", "response", "answer"):
+        value = event.get(key)
+        if isinstance(value, str):
+            return value
+    return ""
+
+
+# Clause-level cut points: punctuation followed by a space, or a spaced dash
+_CLAUSE_RE = re.compile(r"""[,;:](?=\s)|\s[-–—]+(?=\s)""")
+
+
+def _split_sentences(text):
+    sentences = []
+    start = 0
+    for end in find_sentence_boundaries(text):
+        sentence = text[start:end].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = end
+    remainder = text[start:].strip()
+    if remainder:
+        sentences.append(remainder)
+    return sentences
+
+
+def _cut_point_clause(text, limit, min_size=1):
+    """Last clause boundary at or before `limit` chars, if any"""
+    clause_cuts = [m.end() for m in _CLAUSE_RE.finditer(text, 0, limit + 1)
+                   if min_size <= m.end() <= limit]
+    return clause_cuts[-1] if clause_cuts else None
+
+
+def _first_clause_after(text, start, limit):
+    match = _CLAUSE_RE.search(text, start, limit + 1)
+    return match.end() if match and match.end() <= limit else None
+
+
+def _cut_point(text, limit, min_size=1):
+    """Best place to cut text at or before `limit` chars: clause, then word"""
+    clause_cut = _cut_point_clause(text, limit, min_size)
+    if clause_cut:
+        return clause_cut
+    space = text.rfind(" ", min_size, limit + 1)
+    if space > 0:
+        return space
+    return None
+
+
+def segment_text(text, first_chunk_size=60, chunk_size=150, max_chunk_size=500, growth=1.5):
+    """Split a reply into TTS chunks that grow in size.
+
+    The first chunk is kept short and ends on a clause or sentence boundary so
+    the first audio comes back quickly. Later chunks pack whole sentences up to
+    a target that starts at chunk_size and grows by `growth` per chunk, which
+    cuts per-request overhead once playback is already under way; a sentence
+    longer than the current target is cut at a clause or word boundary.
+    Sentences are split on . ! ? and line breaks, never inside abbreviations,
+    decimals or phone numbers such as 425-775-5162.
+    """
+    sentences = _split_sentences(text)
+    if not sentences:
+        return []
+
+    chunks = []
+    first = sentences.pop(0)
+    if len(first) > first_chunk_size:
+        # Prefer the last clause boundary inside the first-chunk budget, then
+        # the nearest one past it (up to chunk_size), then a word boundary
+        min_size = first_chunk_size // 2
+        cut = (_cut_point_clause(first, first_chunk_size, min_size)
+               or _first_clause_after(first, first_chunk_size, chunk_size)
+               or _cut_point(first, first_chunk_size, min_size)
+               or first_chunk_size)
+        sentences.insert(0, first[cut:].strip())
+        first = first[:cut].strip()
+    chunks.append(first)
+
+    target = chunk_size
+    current = ""
+    while sentences:
+        sentence = sentences.pop(0)
+        candidate = f"{current} {sentence}".strip()
+        if len(candidate) <= target:
+            current = candidate
+            continue
+        if current:
+            # Close this chunk; the sentence is retried against the grown target
+            chunks.append(current)
+            current = ""
+            sentences.insert(0, sentence)
+        else:
+            cut = _cut_point(sentence, target, min_size=target // 3) or target
+            chunks.append(sentence[:cut].strip())
+            sentences.insert(0, sentence[cut:].strip())
+        target = min(max_chunk_size, int(target * growth))
+    if current:
+        chunks.append(current)
+    return chunks
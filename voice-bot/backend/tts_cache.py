@@ -0,0 +1,138 @@
+import time
+from collections import OrderedDict, defaultdict
+
+
+def _namespace_counters():
+    return {"hits": 0, "misses": 0, "evictions": 0, "items": 0, "bytes_resident": 0}
+
+
+class LRUByteCache:
+    """In-process LRU cache with a byte budget and per-entry TTL.
+
+    Entries are kept in an OrderedDict in recency order, so lookups, inserts
+    and evictions are all O(1). Expired entries are dropped lazily when they
+    are read, and on every insert expired entries at the cold end of the list
+    are swept before anything live is evicted.
+
+    Every entry is owned by a namespace (one per bot), and hits, misses,
+    evictions and resident bytes are also tracked per namespace so cache
+    usage can be attributed to each tenant.
+    """
+
+    def __init__(self, max_bytes, ttl):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, size, expires_at, namespace)
+        self._namespaces = defaultdict(_namespace_counters)
+        self.bytes_resident = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """Membership test only: no recency update, no counters, no removal"""
+        entry = self._entries.get(key)
+        return entry is not None and time.time() < entry[2]
+
+    def get(self, key, namespace="default", count=True):
+        entry = self._entries.get(key)
+        if entry is None:
+            if count:
+                self.misses += 1
+                self._namespaces[namespace]["misses"] += 1
+            return None
+
+        value, size, expires_at, _ = entry
+        if time.time() >= expires_at:
+            self._remove(key)
+            self.expirations += 1
+            if count:
+                self.misses += 1
+                self._namespaces[namespace]["misses"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        if count:
+            self.hits += 1
+            self._namespaces[namespace]["hits"] += 1
+        return value
+
+    def set(self, key, value, namespace="default", ttl=None):
+        size = len(value)
+        if size > self.max_bytes:
+            # Never let a single oversized clip flush the whole cache
+            return False
+
+        if key in self._entries:
+            self._remove(key)
+
+        now = time.time()
+        self._sweep_expired(now)
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (value, size, expires_at, namespace)
+        self.bytes_resident += size
+        counters = self._namespaces[namespace]
+        counters["items"] += 1
+        counters["bytes_resident"] += size
+
+        while self.bytes_resident > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            evicted_namespace = self._remove(oldest_key)
+            self.evictions += 1
+            self._namespaces[evicted_namespace]["evictions"] += 1
+        return True
+
+    def delete(self, key):
+        if key in self._entries:
+            self._remove(key)
+            return True
+        return False
+
+    def clear_namespace(self, namespace):
+        """Drop every entry owned by one namespace; returns how many were removed"""
+        keys = [key for key, entry in self._entries.items() if entry[3] == namespace]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes_resident = 0
+        for counters in self._namespaces.values():
+            counters["items"] = 0
+            counters["bytes_resident"] = 0
+
+    def _sweep_expired(self, now):
+        """Drop expired entries from the cold end, stopping at the first live one"""
+        while self._entries:
+            oldest_key, (_, _, expires_at, _) = next(iter(self._entries.items()))
+            if now < expires_at:
+                break
+            self._remove(oldest_key)
+            self.expirations += 1
+
+    def _remove(self, key):
+        _, size, _, namespace = self._entries.pop(key)
+        self.bytes_resident -= size
+        counters = self._namespaces[namespace]
+        counters["items"] -= 1
+        counters["bytes_resident"] -= size
+        return namespace
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "items": len(self._entries),
+            "bytes_resident": self.bytes_resident,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "namespaces": {name: dict(counters) for name, counters in self._namespaces.items()}
+        }
@@ -0,0 +1,78 @@
+import asyncio
+import heapq
+import itertools
+from contextlib import asynccontextmanager
+
+# Lower numbers are served first
+PRIORITY_FIRST_AUDIO = 0
+PRIORITY_STREAM_CHUNK = 1
+
+
+class PrioritySemaphore:
+    """Semaphore whose waiters are woken lowest-priority-number first.
+
+    Used to cap concurrent TTS calls across all connections while letting the
+    first chunk of a reply jump ahead of the tail chunks of longer answers.
+    Waiters of equal priority are served FIFO.
+    """
+
+    def __init__(self, value):
+        self.limit = value
+        self._value = value
+        self._waiters = []  # heap of (priority, seq, future); may hold cancelled futures
+        self._waiting = 0  # live waiters in the heap
+        self._seq = itertools.count()
+
+    @property
+    def in_use(self):
+        return self.limit - self._value
+
+    @property
+    def waiting(self):
+        return self._waiting
+
+    async def acquire(self, priority=PRIORITY_STREAM_CHUNK):
+        if self._value > 0 and not self._waiting:
+            self._value -= 1
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        self._waiting += 1
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.cancelled():
+                self._waiting -= 1
+                if len(self._waiters) > 2 * self._waiting + 16:
+                    # Mostly dead entries: rebuild rather than let them pile up
+                    self._waiters = [w for w in self._waiters if not w[2].done()]
+                    heapq.heapify(self._waiters)
+            else:
+                # Slot was handed to us just as we were cancelled; pass it on
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                self._waiting -= 1
+                fut.set_result(None)
+                return
+        self._value += 1
+
+    @asynccontextmanager
+    async def slot(self, priority=PRIORITY_STREAM_CHUNK):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        return {
+            "limit": self.limit,
+            "in_use": self.in_use,
+            "waiting": self.waiting
+        }
@@ -0,0 +1,139 @@
+import asyncio
+
+
+class AudioBroadcast:
+    """One upstream audio stream fanned out to any number of readers.
+
+    A pump task pulls chunks from `source` and keeps them, so a reader that
+    joins late replays what has arrived so far and then follows live. Once
+    the stream is complete `on_complete(audio)` stores it in the caches. If
+    every reader goes away first, the upstream call is cancelled.
+    """
+
+    def __init__(self, source, on_complete):
+        self.chunks = []
+        self.size = 0
+        self.done = False
+        self.error = None
+        self.readers = 0
+        self.abandoned = False
+        self._updated = asyncio.Event()
+        self.task = asyncio.create_task(self._pump(source, on_complete))
+
+    def _notify(self):
+        self._updated.set()
+        self._updated = asyncio.Event()
+
+    async def _pump(self, source, on_complete):
+        try:
+            async for chunk in source:
+                if chunk:
+                    self.chunks.append(chunk)
+                    self.size += len(chunk)
+                    self._notify()
+            await on_complete(b"".join(self.chunks))
+        except asyncio.CancelledError:
+            self.error = ConnectionError("TTS stream abandoned")
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+
+    async def read(self):
+        """Yield the audio from the start, following the stream as it grows"""
+        self.readers += 1
+        position = 0
+        try:
+            while True:
+                if position < len(self.chunks):
+                    position += 1
+                    yield self.chunks[position - 1]
+                elif self.done:
+                    if self.error:
+                        raise self.error
+                    return
+                else:
+                    await self._updated.wait()
+        finally:
+            self.readers -= 1
+            if not self.readers and not self.done:
+                # Nobody is left to hear it
+                self.abandoned = True
+                self.task.cancel()
+
+
+class StreamFlights:
+    """At most one streamed synthesis per cache key; concurrent requests share it"""
+
+    def __init__(self):
+        self._streams = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def open(self, key, source, on_complete):
+        """Reader for the stream under `key`, starting it from `source()` if needed"""
+        broadcast = self._streams.get(key)
+        if broadcast is None or broadcast.abandoned:
+            self.leaders += 1
+            broadcast = self._streams[key] = AudioBroadcast(source(), on_complete)
+            broadcast.task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        else:
+            self.followers += 1
+        return broadcast.read()
+
+    def _forget(self, key, task):
+        if key in self._streams and self._streams[key].task is task:
+            del self._streams[key]
+
+    def stats(self):
+        return {
+            "in_flight": len(self._streams),
+            "upstream_calls": self.leaders,
+            "coalesced": self.followers
+        }
+
+
+def audio_etag(cache_key, size):
+    """Validator for a cached clip, derived from its key instead of re-hashing the audio.
+
+    The key already hashes text, model, voice, format and speed; the size
+    tells apart a later re-synthesis of the same text after the clip expired.
+    """
+    return f'"{cache_key[:32]}-{size:x}"'
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match uses weak comparison: W/ prefixes are ignored"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+def parse_byte_range(header, size):
+    """(start, end) inclusive for a single `bytes=` range, or None to send the whole body.
+
+    Raises ValueError when the range can't be satisfied. Malformed and
+    multi-range headers are ignored (full 200 response), which RFC 9110 allows.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, sep, last = header[6:].strip().partition("-")
+    if not sep or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError("range not satisfiable")
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    if start >= size:
+        raise ValueError("range not satisfiable")
+    end = int(last) if last else size - 1
+    if end < start:
+        return None
+    return start, min(end, size - 1)
@@ -0,0 +1,86 @@
+import hashlib
+import io
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from audio_preprocess import prepare_for_stt
+from vad import parse_wav_header
+
+# Multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadLimitMiddleware:
+    """Refuse request bodies over `max_bytes` on the given paths.
+
+    A Content-Length over the limit is answered with 413 before the body is
+    read; bodies without one are counted as they arrive and cut off at the
+    limit, so an oversized upload never finishes spooling.
+    """
+
+    def __init__(self, app, paths, max_bytes):
+        self.app = app
+        self.paths = set(paths)
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        length = dict(scope["headers"]).get(b"content-length")
+        if length and length.isdigit() and int(length) > self.max_bytes:
+            response = JSONResponse({"detail": self._detail()}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised inside form parsing; FastAPI passes HTTPException through
+                    raise HTTPException(status_code=413, detail=self._detail())
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    def _detail(self):
+        return f"Upload is larger than {self.max_bytes - MULTIPART_OVERHEAD} bytes"
+
+
+def file_digest(fileobj, chunk_size=64 * 1024):
+    """sha256 of a seekable file, read in chunks; leaves it rewound"""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest
+
+
+def inspect_upload(fileobj):
+    """Return (size, duration) of a spooled upload; duration is None unless it is PCM WAV.
+
+    Raises a 400 for a WAV whose fmt chunk has a zero sample rate or channel count.
+    """
+    size = fileobj.seek(0, io.SEEK_END)
+    fileobj.seek(0)
+    header = parse_wav_header(fileobj.read(4096))
+    fileobj.seek(0)
+    if header is None:
+        return size, None
+    sample_rate, channels, sample_width, data_offset = header
+    if not sample_rate or not channels or not sample_width:
+        raise HTTPException(status_code=400, detail="Malformed WAV header")
+    return size, max(0, size - data_offset) / (sample_rate * channels * sample_width)
+
+
+def prepare_wav_upload(fileobj):
+    """Read a WAV upload and shrink it for STT; runs in the preprocess pool"""
+    fileobj.seek(0)
+    return prepare_for_stt(fileobj.read())
@@ -0,0 +1,161 @@
+import struct
+
+try:
+    import numpy as np
+except ImportError:  # without NumPy the realtime socket falls back to a fixed timer
+    np = None
+
+
+def parse_wav_header(data):
+    """Return (sample_rate, channels, sample_width, data_offset) for a PCM WAV, else None"""
+    data = bytes(data[:4096])
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        return None
+
+    offset = 12
+    fmt = None
+    while offset + 8 <= len(data):
+        chunk_id, chunk_size = struct.unpack("<4sI", data[offset:offset + 8])
+        body = offset + 8
+        if chunk_id == b"fmt " and body + 16 <= len(data):
+            audio_format, channels, sample_rate, _, _, bits = struct.unpack(
+                "<HHIIHH", data[body:body + 16]
+            )
+            # 1 = PCM, 0xFFFE = WAVE_FORMAT_EXTENSIBLE (PCM in practice from browsers)
+            if audio_format not in (1, 0xFFFE) or bits != 16:
+                return None
+            fmt = (sample_rate, channels, bits // 8)
+        elif chunk_id == b"data":
+            return fmt + (body,) if fmt else None
+        offset = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+def pcm16_to_mono(pcm, channels):
+    """Convert little-endian int16 PCM to a float32 mono array in [-1, 1]"""
+    samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels]
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def frame_features(samples, frame_len):
+    """Per-frame energy (dBFS) and zero-crossing rate for whole frames"""
+    n_frames = len(samples) // frame_len
+    frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    energy_db = 20.0 * np.log10(rms + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+    return energy_db, zcr
+
+
+class Endpointer:
+    """Energy / zero-crossing VAD that decides when an utterance is over.
+
+    Feed it the PCM of an in-progress recording (a WAV header on the first
+    frame is parsed and skipped, or the format can be given up front). Each
+    call classifies the new 30 ms frames in one vectorized pass and returns
+    None while the user is still talking, or a reason once the utterance
+    should be closed: "end_of_speech" after `trailing_silence_ms` of silence
+    following at least `min_speech_ms` of speech, "max_duration" at the hard
+    cap, or "no_speech" if nothing was said within `no_speech_timeout_ms`.
+    """
+
+    def __init__(self, sample_rate=None, channels=1, frame_ms=30,
+                 threshold_db=-45.0, noise_margin_db=12.0, max_zcr=0.45,
+                 min_speech_ms=150, min_duration_ms=500, trailing_silence_ms=700,
+                 max_duration_ms=15000, no_speech_timeout_ms=5000):
+        self._configured_format = (sample_rate, channels)
+        self.frame_ms = frame_ms
+        self.threshold_db = threshold_db
+        self.noise_margin_db = noise_margin_db
+        self.max_zcr = max_zcr
+        self.min_speech_ms = min_speech_ms
+        self.min_duration_ms = min_duration_ms
+        self.trailing_silence_ms = trailing_silence_ms
+        self.max_duration_ms = max_duration_ms
+        self.no_speech_timeout_ms = no_speech_timeout_ms
+        self.reset()
+
+    def reset(self):
+        # Each utterance may start with its own WAV header, so re-detect the format
+        self.sample_rate, self.channels = self._configured_format
+        self.data_offset = 0
+        self._pending = b""
+        self._header_checked = self.sample_rate is not None
+        # Absolute prior: the threshold starts at threshold_db whatever the first
+        # frames hold, so an utterance that starts at t=0 can't set the floor
+        self.noise_floor_db = self.threshold_db - self.noise_margin_db
+        self.elapsed_ms = 0
+        self.speech_ms = 0
+        self.last_speech_end_ms = None
+
+    @property
+    def supported(self):
+        """False when the stream isn't decodable PCM (e.g. WebM/Opus)"""
+        return np is not None and (self.sample_rate is not None or not self._header_checked)
+
+    def feed(self, data):
+        if np is None:
+            return None
+
+        if not self._header_checked:
+            self._header_checked = True
+            header = parse_wav_header(data)
+            if header is None:
+                return None
+            self.sample_rate, self.channels, _, self.data_offset = header
+            data = memoryview(data)[self.data_offset:]
+        elif self.sample_rate is None:
+            return None
+        elif bytes(data[:4]) == b"RIFF":
+            # Some clients send each frame as a complete WAV file
+            header = parse_wav_header(data)
+            if header:
+                data = memoryview(data)[header[3]:]
+
+        pcm = self._pending + bytes(data)
+        frame_bytes = int(self.sample_rate * self.frame_ms / 1000) * 2 * self.channels
+        usable = len(pcm) - len(pcm) % frame_bytes
+        self._pending = pcm[usable:]
+        if usable == 0:
+            return None
+
+        samples = pcm16_to_mono(pcm[:usable], self.channels)
+        energy_db, zcr = frame_features(samples, frame_bytes // (2 * self.channels))
+
+        threshold = max(self.threshold_db, self.noise_floor_db + self.noise_margin_db)
+        is_speech = (energy_db > threshold) & (zcr < self.max_zcr)
+
+        quiet = energy_db[~is_speech]
+        if quiet.size:
+            # Track the background level slowly so a noisy room raises the bar,
+            # learning only from frames already classified as quiet and never
+            # letting the floor climb into speech levels
+            floor = 0.9 * self.noise_floor_db + 0.1 * float(np.median(quiet))
+            self.noise_floor_db = min(floor, self.threshold_db)
+
+        start_ms = self.elapsed_ms
+        self.elapsed_ms += len(is_speech) * self.frame_ms
+        speech_frames = np.flatnonzero(is_speech)
+        if speech_frames.size:
+            self.speech_ms += speech_frames.size * self.frame_ms
+            self.last_speech_end_ms = start_ms + (int(speech_frames[-1]) + 1) * self.frame_ms
+
+        return self._decision()
+
+    def _decision(self):
+        if self.elapsed_ms >= self.max_duration_ms:
+            return "max_duration"
+        if self.speech_ms == 0:
+            if self.elapsed_ms >= self.no_speech_timeout_ms:
+                return "no_speech"
+            return None
+        silence_ms = self.elapsed_ms - self.last_speech_end_ms
+        if (self.speech_ms >= self.min_speech_ms
+                and self.elapsed_ms >= self.min_duration_ms
+                and silence_ms >= self.trailing_silence_ms):
+            return "end_of_speech"
+        return None
@@ -0,0 +1,132 @@
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+
+# Fields that can carry what a caller said or what the bot answered. They are
+# replaced by their length unless payload logging is switched on.
+PAYLOAD_FIELDS = {
+    "transcript", "text", "response", "message", "payload", "body", "headers",
+    "user_text", "bot_response", "sentence",
+}
+
+LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+}
+
+_sample_rates = {}
+_listener = None
+_queue_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, event, then the event's fields"""
+
+    def __init__(self, log_payloads=False):
+        super().__init__()
+        self.log_payloads = log_payloads
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "event": record.msg
+        }
+        for key, value in getattr(record, "fields", {}).items():
+            if key in PAYLOAD_FIELDS and not self.log_payloads and value is not None:
+                value = f"[redacted {len(str(value))} chars]"
+            entry[key] = value
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread; never blocks, drops when the queue is full"""
+
+    dropped = 0
+
+    def prepare(self, record):
+        # Formatting happens on the writer thread, not on the event loop
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+class StructuredLogger:
+    """log.info("event_name", field=value, ...) with per-level sampling"""
+
+    def __init__(self, name):
+        self._logger = logging.getLogger(name)
+
+    def _log(self, level, event, fields):
+        if not self._logger.isEnabledFor(level):
+            return
+        rate = _sample_rates.get(level, 1.0)
+        if rate < 1.0 and random.random() >= rate:
+            return
+        self._logger.log(level, event, extra={"fields": fields})
+
+    def debug(self, event, **fields):
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event, **fields):
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event, **fields):
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event, **fields):
+        self._log(logging.ERROR, event, fields)
+
+
+log = StructuredLogger("voice")
+
+
+def configure_logging(level="info", sample_rates=None, log_payloads=False,
+                      queue_size=10000, stream=None):
+    """Route the "voice" logger through a bounded queue to a background writer.
+
+    `sample_rates` maps level names to the fraction of events kept, e.g.
+    {"debug": 0.05}; levels not listed are always kept.
+    """
+    global _listener, _queue_handler
+    shutdown_logging()
+
+    _sample_rates.clear()
+    for name, rate in (sample_rates or {}).items():
+        _sample_rates[LEVELS[name]] = float(rate)
+
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(JsonFormatter(log_payloads))
+    log_queue = queue.Queue(maxsize=queue_size)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    _listener = logging.handlers.QueueListener(log_queue, writer)
+    _listener.start()
+
+    logger = logging.getLogger("voice")
+    logger.handlers = [_queue_handler]
+    logger.setLevel(LEVELS[level])
+    logger.propagate = False
+
+
+def shutdown_logging():
+    """Flush what is queued and stop the writer thread"""
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+
+
+def logging_stats():
+    return {
+        "queued": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "dropped": DroppingQueueHandler.dropped
+    }
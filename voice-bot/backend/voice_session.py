@@ -0,0 +1,84 @@
+import asyncio
+import itertools
+
+from voice_logging import log
+
+# Process-wide counters for work started on behalf of a caller who will
+# never hear the result
+session_stats = {
+    "open_sessions": 0,
+    "turns_started": 0,
+    "turns_superseded": 0,
+    "tasks_cancelled_barge_in": 0,
+    "tasks_cancelled_disconnect": 0,
+}
+
+
+class VoiceSession:
+    """Owns the background tasks of one WebSocket connection.
+
+    Every STT -> chatbot -> TTS pipeline is spawned through the session and
+    tagged with the turn it answers. When the caller starts speaking again,
+    supersede() cancels everything still running for earlier turns
+    (barge-in); close() cancels whatever is left when the socket goes away,
+    so no one pays for replies nobody will hear.
+    """
+
+    def __init__(self, websocket, endpoint):
+        self.websocket = websocket
+        self.endpoint = endpoint
+        self._tasks = {}  # task -> turn id
+        self._turn_ids = itertools.count(1)
+        self.current_turn = 0
+        self.closed = False
+        session_stats["open_sessions"] += 1
+
+    def new_turn(self):
+        """Allocate a turn id for a new utterance without cancelling anything yet"""
+        self.current_turn = next(self._turn_ids)
+        session_stats["turns_started"] += 1
+        return self.current_turn
+
+    def spawn(self, coro, turn=None):
+        """Run coro as a task owned by this session (and by `turn`, default current)"""
+        task = asyncio.create_task(coro)
+        if self.closed:
+            task.cancel()
+            return task
+        self._tasks[task] = self.current_turn if turn is None else turn
+        task.add_done_callback(self._forget)
+        return task
+
+    def _forget(self, task):
+        self._tasks.pop(task, None)
+        if not task.cancelled() and task.exception() is not None:
+            log.error("session_task_failed", endpoint=self.endpoint,
+                      error_type=type(task.exception()).__name__, error=str(task.exception()))
+
+    def supersede(self, turn=None):
+        """Cancel tasks belonging to turns older than `turn`; returns how many"""
+        turn = self.current_turn if turn is None else turn
+        stale = [task for task, task_turn in self._tasks.items()
+                 if task_turn < turn and not task.done()]
+        for task in stale:
+            task.cancel()
+        if stale:
+            session_stats["turns_superseded"] += len({self._tasks[t] for t in stale})
+            session_stats["tasks_cancelled_barge_in"] += len(stale)
+        return len(stale)
+
+    def has_pending(self, before_turn=None):
+        before_turn = self.current_turn if before_turn is None else before_turn
+        return any(turn < before_turn and not task.done() for task, turn in self._tasks.items())
+
+    async def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        session_stats["open_sessions"] -= 1
+        pending = [task for task in self._tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        session_stats["tasks_cancelled_disconnect"] += len(pending)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
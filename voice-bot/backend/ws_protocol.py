@@ -0,0 +1,94 @@
+import base64
+import json
+import struct
+
+# Binary audio frames: a 14-byte big-endian header, an optional UTF-8 JSON
+# object with the message's other fields, then the raw audio.
+#
+#   magic        2s  b"VA"
+#   version      B   2
+#   message type B   see AUDIO_MESSAGE_TYPES
+#   session_id   I   0 when the socket has no session
+#   chunk_index  H   0 for single-shot replies
+#   total_chunks H   NO_TOTAL when not known yet
+#   meta_length  H   bytes of JSON after the header (text_chunk, chunk_id,
+#                    bot_id, ...); 0 when there are none
+#
+# The fields travel in the same frame as the audio, so the send queue can
+# never drop or reorder one without the other. Control messages
+# (transcripts, bot text, status) stay JSON text frames.
+AUDIO_FRAME_MAGIC = b"VA"
+AUDIO_FRAME_VERSION = 2
+AUDIO_FRAME_FORMAT = "!2sBBIHHH"
+AUDIO_FRAME_HEADER = struct.Struct(AUDIO_FRAME_FORMAT)
+NO_TOTAL = 0xFFFF
+
+AUDIO_MESSAGE_TYPES = {
+    "audio_chunk": 1,
+    "audio_response": 2,
+    "chunk_audio": 3,
+    "audio": 4,
+}
+
+
+def wants_binary_audio(websocket):
+    """Clients negotiate binary audio frames by connecting with ?audio=binary"""
+    return websocket.query_params.get("audio") == "binary"
+
+
+def encode_audio_frame(message_type, audio_content, session_id=0, chunk_index=0, total_chunks=None,
+                       meta=None):
+    meta_bytes = json.dumps(meta, separators=(",", ":"), ensure_ascii=False).encode() if meta else b""
+    if len(meta_bytes) > 0xFFFF:
+        raise ValueError("audio frame metadata is larger than 64 KiB")
+    header = AUDIO_FRAME_HEADER.pack(
+        AUDIO_FRAME_MAGIC,
+        AUDIO_FRAME_VERSION,
+        AUDIO_MESSAGE_TYPES[message_type],
+        (session_id or 0) & 0xFFFFFFFF,
+        chunk_index & 0xFFFF,
+        NO_TOTAL if total_chunks is None else min(total_chunks, NO_TOTAL - 1),
+        len(meta_bytes)
+    )
+    # One copy into the outgoing frame; no base64, no JSON string
+    return header + meta_bytes + audio_content
+
+
+async def send_protocol_info(websocket):
+    """Confirm the negotiated audio encoding right after accept()"""
+    if wants_binary_audio(websocket):
+        await websocket.send_json({
+            "type": "protocol",
+            "audio": "binary",
+            "header": AUDIO_FRAME_FORMAT,
+            "version": AUDIO_FRAME_VERSION,
+            "message_types": AUDIO_MESSAGE_TYPES
+        })
+
+
+async def send_audio(websocket, message_type, audio_content, session_id=None,
+                     chunk_index=None, total_chunks=None, **fields):
+    """Send audio as a binary frame if negotiated, otherwise as base64 JSON"""
+    if wants_binary_audio(websocket):
+        await websocket.send_bytes(encode_audio_frame(
+            message_type,
+            audio_content,
+            session_id=session_id,
+            chunk_index=chunk_index or 0,
+            total_chunks=total_chunks,
+            meta=fields
+        ))
+        return
+
+    message = {
+        "type": message_type,
+        "data": base64.b64encode(audio_content).decode()
+    }
+    if session_id is not None:
+        message["session_id"] = session_id
+    if chunk_index is not None:
+        message["chunk_index"] = chunk_index
+    if total_chunks is not None:
+        message["total_chunks"] = total_chunks
+    message.update(fields)
+    await websocket.send_json(message)
@@ -0,0 +1,221 @@
+import asyncio
+import json
+from collections import deque
+
+from metrics import current_turn
+from ws_protocol import AUDIO_MESSAGE_TYPES
+from voice_logging import log
+
+# Turn trailers travel in the audio lane so they never overtake the audio they close
+AUDIO_TRAILER_TYPES = {"audio_complete", "processing_complete"}
+
+# Cumulative messages: a newer one makes a still-queued older one pointless
+LATEST_WINS_TYPES = {"partial_transcript"}
+
+SLOW_CONSUMER_POLICIES = ("drop", "coalesce", "disconnect")
+
+CONTROL, AUDIO = 0, 1
+
+sender_stats = {
+    "open_sockets": 0,
+    "slow_consumers": 0,
+    "slow_disconnects": 0,
+    "dropped_messages": 0,
+    "dropped_bytes": 0,
+    "coalesced": 0,
+    "max_queued_bytes": 0,
+}
+
+
+class SlowConsumerError(ConnectionError):
+    pass
+
+
+class WebSocketSender:
+    """Single writer for one WebSocket with a bounded, two-lane send queue.
+
+    Handlers keep calling send_json / send_bytes as before, but the calls only
+    enqueue; one writer task drains the queue. Control messages (transcripts,
+    status) go ahead of audio, and audio frames are bounded by `max_bytes`.
+    When a client can't drain fast enough the policy decides what gives:
+
+      drop        new audio is discarded until the queue is half empty again
+      coalesce    the oldest queued audio is discarded to make room for new audio
+      disconnect  the socket is closed with 1013 (try again later)
+
+    Clients are told about dropped audio with an "audio_dropped" message.
+    JSON messages sent on behalf of a turn carry its trace_id.
+    Anything else (receive_*, query_params, close) goes straight to the socket.
+    """
+
+    def __init__(self, websocket, max_bytes=2 * 1024 * 1024, policy="drop"):
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.websocket = websocket
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self._lanes = (deque(), deque())
+        self._ready = asyncio.Event()
+        self.queued_bytes = 0
+        self.slow = False
+        self.closed = False
+        self.error = None
+        self._writer = asyncio.create_task(self._run())
+        self._open = True
+        sender_stats["open_sockets"] += 1
+
+    def __getattr__(self, name):
+        return getattr(self.websocket, name)
+
+    async def send_json(self, data, mode="text"):
+        turn = current_turn()
+        if turn and isinstance(data, dict) and "trace_id" not in data:
+            data = {**data, "trace_id": turn.trace_id}
+        payload = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        message_type = data.get("type") if isinstance(data, dict) else None
+        if message_type in AUDIO_MESSAGE_TYPES or message_type in AUDIO_TRAILER_TYPES:
+            lane = AUDIO
+        else:
+            lane = CONTROL
+        if mode == "binary":
+            await self._enqueue(lane, "bytes", payload.encode(), message_type)
+        else:
+            await self._enqueue(lane, "text", payload, message_type)
+
+    async def send_text(self, data):
+        await self._enqueue(CONTROL, "text", data, None)
+
+    async def send_bytes(self, data):
+        # Binary frames are always audio (see ws_protocol.encode_audio_frame)
+        await self._enqueue(AUDIO, "bytes", data, "audio")
+
+    async def _enqueue(self, lane, kind, payload, message_type):
+        if self.closed:
+            raise self.error or RuntimeError("WebSocket send queue is closed")
+
+        size = len(payload)
+        entry = (kind, payload, message_type, size)
+
+        if message_type in LATEST_WINS_TYPES and self._replace(lane, entry):
+            return
+
+        droppable = lane == AUDIO and message_type not in AUDIO_TRAILER_TYPES
+        if droppable:
+            turn = current_turn()
+            if turn:
+                turn.audio_ready()
+        if droppable and (self.slow or self.queued_bytes + size > self.max_bytes):
+            if not await self._make_room(size):
+                return
+        elif self.queued_bytes + size > 2 * self.max_bytes:
+            # Even control traffic has piled up: the client is gone in all but name
+            await self._disconnect()
+
+        self._lanes[lane].append(entry)
+        self.queued_bytes += size
+        sender_stats["max_queued_bytes"] = max(sender_stats["max_queued_bytes"], self.queued_bytes)
+        self._ready.set()
+
+    def _replace(self, lane, entry):
+        queue = self._lanes[lane]
+        for i, queued in enumerate(queue):
+            if queued[2] == entry[2]:
+                self.queued_bytes += entry[3] - queued[3]
+                queue[i] = entry
+                sender_stats["coalesced"] += 1
+                return True
+        return False
+
+    async def _make_room(self, size):
+        """Apply the slow consumer policy; returns True if the new audio may be queued"""
+        if not self.slow:
+            self.slow = True
+            sender_stats["slow_consumers"] += 1
+            log.warning("slow_consumer", queued_bytes=self.queued_bytes, policy=self.policy)
+            if self.policy != "disconnect":
+                self._lanes[CONTROL].append(self._notice())
+                self._ready.set()
+
+        if self.policy == "disconnect":
+            await self._disconnect()
+
+        if self.policy == "coalesce":
+            audio = self._lanes[AUDIO]
+            kept = deque()
+            while audio and self.queued_bytes + size > self.max_bytes:
+                queued = audio.popleft()
+                if queued[2] in AUDIO_TRAILER_TYPES:
+                    kept.append(queued)
+                    continue
+                self.queued_bytes -= queued[3]
+                self._count_drop(queued[3])
+            audio.extendleft(reversed(kept))
+            if self.queued_bytes + size <= self.max_bytes:
+                return True
+
+        self._count_drop(size)
+        return False
+
+    def _notice(self):
+        payload = json.dumps({"type": "audio_dropped", "policy": self.policy}, separators=(",", ":"))
+        self.queued_bytes += len(payload)
+        return ("text", payload, "audio_dropped", len(payload))
+
+    def _count_drop(self, size):
+        sender_stats["dropped_messages"] += 1
+        sender_stats["dropped_bytes"] += size
+
+    async def _disconnect(self):
+        sender_stats["slow_disconnects"] += 1
+        log.warning("slow_consumer_disconnected", queued_bytes=self.queued_bytes)
+        self.error = SlowConsumerError("client is not reading fast enough")
+        await self.aclose()
+        try:
+            await asyncio.wait_for(self.websocket.close(code=1013), timeout=1.0)
+        except Exception:
+            pass
+        raise self.error
+
+    async def _run(self):
+        try:
+            while True:
+                await self._ready.wait()
+                lane = self._lanes[CONTROL] if self._lanes[CONTROL] else self._lanes[AUDIO]
+                if not lane:
+                    self._ready.clear()
+                    continue
+                kind, payload, _, size = lane.popleft()
+                self.queued_bytes -= size
+                if self.slow and self.queued_bytes <= self.max_bytes // 2:
+                    self.slow = False
+                if kind == "bytes":
+                    await self.websocket.send_bytes(payload)
+                else:
+                    await self.websocket.send_text(payload)
+        except Exception as e:
+            # The socket is gone; later sends fail fast instead of queueing forever
+            self.error = e
+            self._close_queue()
+
+    def _close_queue(self):
+        self.closed = True
+        for lane in self._lanes:
+            lane.clear()
+        self.queued_bytes = 0
+
+    async def aclose(self):
+        """Stop the writer and free whatever is still queued"""
+        if self._open:
+            self._open = False
+            sender_stats["open_sockets"] -= 1
+        self._close_queue()
+        if self._writer is not asyncio.current_task():
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+
+    def stats(self):
+        return {
+            "queued_bytes": self.queued_bytes,
+            "queued_messages": len(self._lanes[CONTROL]) + len(self._lanes[AUDIO]),
+            "slow": self.slow
+        }
@@ -13,8 +13,9 @@ class StreamingVoiceService {
 
     async startRealTimeVoice(autoStartRecording = false) {
         try {
-            // Connect to real-time WebSocket
-            this.ws = new WebSocket('ws://localhost:8090/ws/voice-realtime');
+            // Connect to real-time WebSocket; audio comes back as binary frames
+            this.ws = new WebSocket('ws://localhost:8090/ws/voice-realtime?audio=binary');
+            this.ws.binaryType = 'arraybuffer';
             this.autoStartRecording = autoStartRecording;
             
             this.ws.onopen = async () => {
@@ -30,10 +31,19 @@ class StreamingVoiceService {
             };
             
             this.ws.onmessage = (event) => {
+                if (event.data instanceof ArrayBuffer) {
+                    this.handleAudioFrame(event.data);
+                    return;
+                }
+                
                 const data = JSON.parse(event.data);
                 console.log('WebSocket message:', data);
                 
                 switch(data.type) {
+                    case 'protocol':
+                        console.log('Audio protocol:', data.audio);
+                        break;
+                        
                     case 'recording_started':
                         this.currentSession = data.session_id;
                         this.showRecordingIndicator();
@@ -218,6 +228,30 @@ class StreamingVoiceService {
         this.disableVoiceMode();
     }
 
+    // Binary audio frame: 14-byte big-endian header, JSON metadata, then raw MP3 bytes
+    // magic "VA" | version u8 | type u8 | session_id u32 | chunk_index u16 | total u16 | meta_length u16
+    handleAudioFrame(buffer) {
+        const view = new DataView(buffer);
+        if (buffer.byteLength < 14 || view.getUint8(0) !== 0x56 || view.getUint8(1) !== 0x41) {
+            console.error('Unknown binary frame');
+            return;
+        }
+        
+        const messageType = view.getUint8(3);
+        const metaLength = view.getUint16(12);
+        if (metaLength) {
+            const meta = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 14, metaLength)));
+            console.log('Audio frame metadata:', meta);
+        }
+        const audioBytes = new Uint8Array(buffer, 14 + metaLength);
+        
+        // 1 = audio_chunk, 2 = audio_response, 3 = chunk_audio, 4 = audio
+        this.playAudioBlob(new Blob([audioBytes], { type: 'audio/mpeg' }));
+        if (messageType === 2 && this.onAudioResponseReceived) {
+            this.onAudioResponseReceived();
+        }
+    }
+
     base64ToBlob(base64, mimeType) {
         const byteCharacters = atob(base64);
         const byteNumbers = new Array(byteCharacters.length);
@@ -387,7 +421,15 @@ class StreamingVoiceService {
     
     playAudioResponse(base64Audio) {
         try {
-            const audioBlob = this.base64ToBlob(base64Audio, 'audio/mpeg');
+            this.playAudioBlob(this.base64ToBlob(base64Audio, 'audio/mpeg'));
+        } catch (error) {
+            console.error('Audio decode failed:', error);
+            this.enableRecordingButton();
+        }
+    }
+    
+    playAudioBlob(audioBlob) {
+        try {
             const audioUrl = URL.createObjectURL(audioBlob);
             const audio = new Audio(audioUrl);
             